@@ -1,13 +1,14 @@
-import json
+from json_stream import iter_object_of_arrays
 from playerDB import PlayerDataDB
-from player_data_analyzer import PlayersDataAnalyzer
 
 
-db = PlayerDataDB("player_data.db")
-db.create_tables()
+def open_db(db_name="player_data.db"):
+    db = PlayerDataDB(db_name)
+    db.create_tables()
+    return db
 
 
-def insert_all_teams(teams):
+def insert_all_teams(db, teams):
     for team_name, team_data in teams.items():
         overall = team_data['overall']
         attack = team_data['attack']
@@ -16,7 +17,7 @@ def insert_all_teams(teams):
         print("Added team: " + team_name)
 
 
-def insert_all_players(players):
+def insert_all_players(db, players):
     for player in players:
         name = player["name"]
         position = player["position"]
@@ -28,7 +29,7 @@ def insert_all_players(players):
         print("Added player" + name)
 
 
-def insert_all_fixtures(players):
+def insert_all_fixtures(db, players):
     for positions in players:
         for player in positions:
             player_info = db.get_player_by_name(player["name"])
@@ -42,7 +43,7 @@ def insert_all_fixtures(players):
             print(f"Added {player['name']} all fixtures")
 
 
-def insert_all_events(players):
+def insert_all_events(db, players):
     for positions in players:
         for player in positions:
             player_fixtures = db.get_fixtures_by_player_name(player['name'])
@@ -54,7 +55,7 @@ def insert_all_events(players):
             print(f"Added {player['name']} all events")
 
 
-def insert_all_events_by_fixture(players, fixutre_name):
+def insert_all_events_by_fixture(db, players, fixutre_name):
     for positions in players:
         for player in positions:
             player_fixtures = db.get_fixtures_by_player_name(player['name'])
@@ -67,21 +68,17 @@ def insert_all_events_by_fixture(players, fixutre_name):
                 print(f"Added {player['name']} all events")
 
 
-def insert_DB():
-    json_file_path = "all_players_data.json"
-    analyzer = PlayersDataAnalyzer(json_file_path)
+def insert_DB(db, json_file_path="data/all_players_data.json"):
     # insert all players first time to the DB
-    total_players = analyzer.get_total_players("All", -10)
+    total_players = get_fixture_players(json_file_path)
     teams = {'מכבי פתח תקווה': {'overall': 3.0, 'attack': 3.0, 'defend': 3.0}, 'הפועל חיפה': {'overall': 3.0, 'attack': 4.0, 'defend': 3.0}, 'מכבי נתניה': {'overall': 3.0, 'attack': 4.0, 'defend': 3.0}, 'הפועל ירושלים': {'overall': 4.0, 'attack': 4.0, 'defend': 3.0}, 'בני סכנין': {'overall': 2.0, 'attack': 3.0, 'defend': 2.0}, 'מכבי חיפה': {'overall': 5.0, 'attack': 5.0, 'defend': 5.0}, 'מכבי בני ריינה': {'overall': 1.0, 'attack': 2.0, 'defend': 2.0},
              'מכבי תל אביב': {'overall': 5.0, 'attack': 5.0, 'defend': 5.0}, 'בית"ר ירושלים': {'overall': 4.0, 'attack': 4.0, 'defend': 3.0}, 'מ.ס. אשדוד': {'overall': 2.0, 'attack': 3.0, 'defend': 1.0}, 'הפועל חדרה': {'overall': 1.0, 'attack': 1.0, 'defend': 2.0}, 'הפועל תל אביב': {'overall': 3.0, 'attack': 3.0, 'defend': 3.0}, 'הפועל פתח תקווה': {'overall': 1.0, 'attack': 1.0, 'defend': 3.0}, 'הפועל באר שבע': {'overall': 4.0, 'attack': 4.0, 'defend': 4.0}}
-    insert_all_teams(teams)
-    insert_all_players(total_players)
-    insert_all_fixtures(total_players)
-    insert_all_events(total_players)
+    insert_all_teams(db, teams)
+    print_ingest_counts(db.bulk_upsert(total_players))
     print(len(db.get_all_players()))
 
 
-def update_player_data(players_data):
+def update_player_data(db, players_data):
     # Iterate through the player data and update the database
     for position in players_data:
         for player_info in position:
@@ -105,23 +102,36 @@ def update_player_data(players_data):
                 print("Added player" + name)
 
 
+class FixturePlayersFile:
+    # The position lists of an all_players_data JSON file, read one player at
+    # a time. Every iteration reads the file again, so bulk_upsert can make
+    # its passes without the whole season being loaded.
+    def __init__(self, json_file_path):
+        self.json_file_path = json_file_path
+
+    def __iter__(self):
+        for position, players in iter_object_of_arrays(self.json_file_path):
+            yield players
+
+
 def get_fixture_players(json_file_path):
-    with open(json_file_path, "r", encoding="utf-8") as json_file:
-        players_data = json.load(json_file)
-    players = players_data.values()
-    return players
+    return FixturePlayersFile(json_file_path)
+
+
+def print_ingest_counts(counts):
+    for table, table_counts in counts.items():
+        print(
+            f"{table}: {table_counts['inserted']} inserted, {table_counts['updated']} updated, {table_counts['skipped']} skipped")
 
 
-def update_DB():
-    fixture_name = "fixture6"
-    json_file_path = f"data/all_players_data_{fixture_name}.json"
+def update_DB(db, fixture_name="fixture6", json_file_path=None):
+    json_file_path = json_file_path or f"data/all_players_data_{fixture_name}.json"
     print("Updating DB:")
     total_players = get_fixture_players(json_file_path)
-    update_player_data(total_players)
-    insert_all_fixtures(total_players)
-    insert_all_events_by_fixture(total_players, fixture_name)
+    print_ingest_counts(db.bulk_upsert(total_players))
 
 
-update_DB()
+if __name__ == "__main__":
+    update_DB(open_db())
 # players = get_fixture_players("data/all_players_data_fixture5.json")
 # print(len(players))
@@ -0,0 +1,246 @@
+import argparse
+import os
+
+
+# Command line entry point, run from the repository root:
+#   python -m cli migrate
+#   python -m cli migrate-html
+#   python -m cli extract --scrape players_fixture6 --workers 4
+#   python -m cli ingest --fixture fixture6
+#   python -m cli rate
+#   python -m cli best-team --fixture fixture1 --key points
+#   python -m cli sequence --method plan
+#   python -m cli ga --size 5 --generations 20 --workers 4
+# Every command imports what it needs when it runs, so `python -m cli -h`
+# and the small commands don't load pulp, numpy or bs4.
+
+
+def get_analyzer(args):
+    from player_data_analyzer import PlayersDataAnalyzer
+
+    return PlayersDataAnalyzer(
+        args.db,
+        solver=args.solver,
+        time_limit=args.time_limit,
+        mip_gap=args.mip_gap,
+        solve_cache=args.solve_cache,
+    )
+
+
+def display_sequence(analyzer, team_sq):
+    for fixture in team_sq:
+        print(f'Team {fixture}:')
+        analyzer.display_team(team_sq[fixture])
+    print(analyzer.fitness(team_sq))
+
+    fix = analyzer.check_sequence(team_sq)
+    if fix is not None:
+        print(fix)
+    else:
+        print("OK!!")
+
+
+def extract(args):
+    from players_data_extract import (
+        benchmark_extraction,
+        process_player_folders,
+        process_store_scrape,
+        verify_fast_parser,
+    )
+
+    manifest_path = None if args.no_manifest else args.manifest
+    if args.scrape:
+        process_store_scrape(args.scrape, args.store, args.workers, args.output, args.compact, manifest_path)
+    elif args.verify:
+        if verify_fast_parser(args.verify_root):
+            raise SystemExit(1)
+    elif args.benchmark:
+        benchmark_extraction(args.root, args.workers and [1, args.workers])
+    else:
+        process_player_folders(args.root, args.workers, args.output, args.compact, manifest_path)
+
+
+def migrate_html(args):
+    from html_store import migrate_trees
+
+    migrate_trees(args.store, args.players_directory)
+
+
+def ingest(args):
+    from DBstart import insert_DB, open_db, update_DB
+
+    db = open_db(args.db)
+    if args.initial:
+        insert_DB(db, args.json or "data/all_players_data.json")
+    else:
+        update_DB(db, args.fixture, args.json)
+
+
+def migrate(args):
+    from playerDB import PlayerDataDB
+
+    # Creates missing tables and runs pending migrations, which also happens
+    # whenever the database is opened read-write
+    db = PlayerDataDB(args.db)
+    db.create_tables()
+    print(f"Schema version: {db.migrate()}")
+
+
+def rate(args):
+    from rate_players import main
+
+    run_id = main(args.db, args.output)
+    print(f"Rating run: {run_id}")
+
+
+def best_team(args):
+    analyzer = get_analyzer(args)
+    if args.k > 1:
+        teams = analyzer.find_k_best_teams(
+            args.fixture, args.k, args.key, args.sub_key, args.budget, args.min_budget, args.output)
+        for team in teams:
+            analyzer.display_team(team)
+        return
+
+    try:
+        team = analyzer.find_best_team(
+            args.fixture, args.key, args.sub_key, args.budget, args.min_budget, args.fixed)
+    except ValueError as error:
+        # e.g. a misspelled --fixed name
+        raise SystemExit(error)
+    analyzer.display_team(team)
+
+
+def sequence(args):
+    analyzer = get_analyzer(args)
+    fixture_sequence = args.fixtures or analyzer.fixture_list
+    starting_team = analyzer.find_best_team(
+        fixture_sequence[0], args.key, args.sub_key, args.budget, args.min_budget)
+    if args.method == "plan":
+        team_sq = analyzer.plan_sequence_of_squads(starting_team, fixture_sequence)
+    else:
+        team_sq = analyzer.find_best_sequence_of_squads(starting_team, fixture_sequence)
+    display_sequence(analyzer, team_sq)
+
+
+def ga(args):
+    analyzer = get_analyzer(args)
+    if args.engine == "local_search":
+        best = analyzer.local_search(
+            restarts=args.size, time_budget=args.time_budget, seed=args.seed)
+    elif args.islands:
+        best = analyzer.ga_islands(
+            args.size,
+            args.generations,
+            args.mu_prob,
+            islands=args.islands,
+            migration_interval=args.migration_interval,
+            seed=args.seed,
+        )
+    else:
+        best = analyzer.ga(
+            args.size,
+            args.generations,
+            args.mu_prob,
+            workers=args.workers,
+            seed=args.seed,
+            time_budget=args.time_budget,
+            stall_generations=args.stall_generations,
+            checkpoint_file=args.checkpoint,
+            resume=args.resume,
+        )
+    display_sequence(analyzer, best)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Israeli Dream League tool")
+    parser.add_argument("--db", default="player_data.db", help="player database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    solver_options = argparse.ArgumentParser(add_help=False)
+    solver_options.add_argument("--solver", default="auto", help="highs, cbc or any PuLP solver name")
+    solver_options.add_argument("--time-limit", type=float, default=None)
+    solver_options.add_argument("--mip-gap", type=float, default=None)
+    solver_options.add_argument("--solve-cache", default=None, help="file of cached best-team results")
+
+    team_options = argparse.ArgumentParser(add_help=False)
+    team_options.add_argument("--key", default="points")
+    team_options.add_argument("--sub-key", default="points")
+    team_options.add_argument("--budget", type=float, default=108)
+    team_options.add_argument("--min-budget", type=float, default=92)
+
+    command = subparsers.add_parser("extract", help="parse a scraped players tree into a JSON file")
+    command.add_argument("--root", default="data/players/players_fixture6/", help="folder of PlayerN folders")
+    command.add_argument("--output", default="data/all_players_data_fixture6.json")
+    command.add_argument("--workers", type=int, default=None, help="parse in this many processes")
+    command.add_argument("--benchmark", action="store_true",
+                         help="time parsing with 1 to --workers (default all cores) processes instead")
+    command.add_argument("--compact", action="store_true", help="write the JSON without indentation")
+    command.add_argument("--manifest", default="data/extract_manifest.db",
+                         help="parsed results of earlier runs, only new or changed files are parsed")
+    command.add_argument("--no-manifest", action="store_true", help="parse every file")
+    command.add_argument("--verify", action="store_true",
+                         help="check that the fast HTML parsers match BeautifulSoup on every file instead")
+    command.add_argument("--verify-root", default="data/players/")
+    command.add_argument("--scrape", default=None,
+                         help="read this scrape (e.g. players_fixture6) from the HTML store instead of --root")
+    command.add_argument("--store", default="data/players/html_store.db")
+    command.set_defaults(handler=extract)
+
+    command = subparsers.add_parser("migrate-html", help="pack the scraped PlayerN folders into the HTML store")
+    command.add_argument("--players-directory", default="data/players/", help="folder of the scrape trees")
+    command.add_argument("--store", default="data/players/html_store.db")
+    command.set_defaults(handler=migrate_html)
+
+    command = subparsers.add_parser("ingest", help="load scraped player data into the database")
+    command.add_argument("--fixture", default="fixture6", help="update from data/all_players_data_<fixture>.json")
+    command.add_argument("--json", default=None, help="players JSON file to load instead")
+    command.add_argument("--initial", action="store_true", help="first load, with the teams")
+    command.set_defaults(handler=ingest)
+
+    command = subparsers.add_parser("migrate", help="bring the database up to the current schema")
+    command.set_defaults(handler=migrate)
+
+    command = subparsers.add_parser("rate", help="rate the players and store their stars")
+    command.add_argument("--output", default="player_ratings.txt")
+    command.set_defaults(handler=rate)
+
+    command = subparsers.add_parser(
+        "best-team", parents=[solver_options, team_options], help="best team of a fixture")
+    command.add_argument("--fixture", default="All")
+    command.add_argument("--fixed", nargs="*", default=(), help="players that must be picked")
+    command.add_argument("-k", type=int, default=1, help="show the k best distinct teams")
+    command.add_argument("--output", default=None, help="save the k best teams to this JSON file")
+    command.set_defaults(handler=best_team)
+
+    command = subparsers.add_parser(
+        "sequence", parents=[solver_options, team_options], help="teams for a window of fixtures")
+    command.add_argument("--fixtures", nargs="*", default=None)
+    command.add_argument("--method", choices=("greedy", "plan"), default="greedy",
+                         help="one solve per fixture, or the whole window in one solve")
+    command.set_defaults(handler=sequence)
+
+    command = subparsers.add_parser("ga", parents=[solver_options], help="search sequences of teams")
+    command.add_argument("--engine", choices=("ga", "local_search"), default="ga")
+    command.add_argument("--size", type=int, default=5)
+    command.add_argument("--generations", type=int, default=20)
+    command.add_argument("--mu-prob", type=float, default=0.7)
+    command.add_argument("--workers", type=int, default=os.cpu_count())
+    command.add_argument("--seed", type=int, default=None)
+    command.add_argument("--time-budget", type=float, default=None, help="seconds")
+    command.add_argument("--stall-generations", type=int, default=None)
+    command.add_argument("--checkpoint", default=None, help="population file, saved every generation")
+    command.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    command.add_argument("--islands", type=int, default=None, help="run this many island populations")
+    command.add_argument("--migration-interval", type=int, default=5)
+    command.set_defaults(handler=ga)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ def count_players_in_teams(json_file_path):
 
     return sorted_player_count_list
     
-def display_random_team():
+def display_random_team(json_file_path):
         # Load the JSON file
     with open(json_file_path, 'r', encoding='utf-8') as file:
         data = json.load(file)
@@ -43,12 +43,13 @@ def display_random_team():
 
 # Usage example:
 # Enter best team file:
-json_file_path = 'best_teams/fixture6.json'  
+if __name__ == "__main__":
+    json_file_path = 'best_teams/fixture6.json'  
 
-player_count_list = count_players_in_teams(json_file_path)
+    player_count_list = count_players_in_teams(json_file_path)
 
-# Print the list of player names and their counts
-for player_name, count in player_count_list:
-    print(f"{player_name}: {count}")
+    # Print the list of player names and their counts
+    for player_name, count in player_count_list:
+        print(f"{player_name}: {count}")
 
-display_random_team()
+    display_random_team(json_file_path)
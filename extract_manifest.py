@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+
+class ExtractManifest:
+    # Parsed results of scraped HTML files, kept in a small SQLite file so
+    # extraction only parses files it has not seen. Files are tracked by
+    # path with their size, mtime and content hash; results are stored by
+    # content hash, so a touched but unchanged file or the same document in
+    # another scrape is not parsed again. parser_version is part of the
+    # result key, bump it when a parser changes its output.
+    def __init__(self, path, parser_version=1):
+        self.path = path
+        self.parser_version = parser_version
+        self.hits = 0
+        self.misses = 0
+        self.hashed = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS ManifestFiles (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT
+            )
+            '''
+        )
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS ParsedResults (
+                content_hash TEXT,
+                kind TEXT,
+                result TEXT,
+                PRIMARY KEY (content_hash, kind)
+            )
+            '''
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def read_text(data):
+        # Same text as open(..., encoding="utf-8").read()
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+    def lookup(self, file_path, kind):
+        # (result, None) when the file's content was parsed before, else
+        # (None, (content_hash, html_content)) for the caller to parse and store
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM ManifestFiles WHERE path = ?", (file_path,)
+        ).fetchone()
+
+        html_content = None
+        if row is not None and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+            content_hash = row[2]
+        else:
+            with open(file_path, "rb") as html_file:
+                data = html_file.read()
+            self.hashed += 1
+            content_hash = hashlib.sha256(data).hexdigest()
+            html_content = self.read_text(data)
+            self.conn.execute(
+                '''
+                INSERT INTO ManifestFiles (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns, content_hash = excluded.content_hash
+                ''',
+                (file_path, stat.st_size, stat.st_mtime_ns, content_hash),
+            )
+
+        result = self.lookup_hash(content_hash, kind)
+        if result is not None:
+            return result, None
+
+        if html_content is None:
+            with open(file_path, "rb") as html_file:
+                html_content = self.read_text(html_file.read())
+        return None, (content_hash, html_content)
+
+    def lookup_hash(self, content_hash, kind):
+        # Parsed result of content with this hash, None if not parsed yet
+        row = self.conn.execute(
+            "SELECT result FROM ParsedResults WHERE content_hash = ? AND kind = ?",
+            (content_hash, self.result_kind(kind)),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def result_kind(self, kind):
+        return f"{kind}:{self.parser_version}"
+
+    def store(self, content_hash, kind, result):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ParsedResults (content_hash, kind, result) VALUES (?, ?, ?)",
+            (content_hash, self.result_kind(kind), json.dumps(result, ensure_ascii=False)),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hashed": self.hashed}
+
+    def close(self):
+        self.conn.close()
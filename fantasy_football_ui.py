@@ -163,9 +163,9 @@ class DatabasePage(tk.Frame):
     def sort_players(self, tree, key, fixture):
         # Get top 25 players by points
         if fixture == "All":
-            top_players = self.controller.analyzer.db.get_all_players()
+            top_players = self.controller.analyzer.snapshot.all_players()
         else:
-            top_players = self.controller.analyzer.db.get_players_by_fixture(
+            top_players = self.controller.analyzer.snapshot.players_by_fixture(
                 fixture)
         top_players.sort(
             key=lambda player: player[key] if key != "Rank" else player["points"], reverse=True)
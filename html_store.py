@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+from urllib.request import pathname2url
+
+
+# Scraped HTML documents packed in one SQLite file instead of a folder per
+# player. A document is keyed by (scrape, player index, document): the scrape
+# is the name of the old tree (e.g. "players_fixture6"), the player index the
+# N of its PlayerN folder, and the document "profile" or a fixture name
+# ("fixture6"). Content is stored zlib-compressed with its sha256, which
+# extraction uses as the content hash of its manifest.
+DEFAULT_STORE = "data/players/html_store.db"
+
+
+def natural_sort_key(name):
+    # "Player2" before "Player10", "fixture2" before "fixture10"
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class HtmlStore:
+    def __init__(self, path=DEFAULT_STORE, read_only=False):
+        self.path = path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+            return
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS Documents (
+                scrape TEXT,
+                player_index INTEGER,
+                document TEXT,
+                content_hash TEXT,
+                content BLOB,
+                PRIMARY KEY (scrape, player_index, document)
+            )
+            '''
+        )
+        self.conn.commit()
+
+    def put(self, scrape, player_index, document, html_content, commit=True):
+        data = html_content.encode("utf-8")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO Documents VALUES (?, ?, ?, ?, ?)",
+            (scrape, player_index, document, hashlib.sha256(data).hexdigest(), zlib.compress(data, 6)),
+        )
+        if commit:
+            self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def get(self, scrape, player_index, document):
+        # HTML of one document, None when it is not stored
+        row = self.conn.execute(
+            "SELECT content FROM Documents WHERE scrape = ? AND player_index = ? AND document = ?",
+            (scrape, player_index, document),
+        ).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row is not None else None
+
+    def content_hash(self, scrape, player_index, document):
+        row = self.conn.execute(
+            "SELECT content_hash FROM Documents WHERE scrape = ? AND player_index = ? AND document = ?",
+            (scrape, player_index, document),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def scrapes(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT scrape FROM Documents ORDER BY scrape")]
+
+    def player_indices(self, scrape):
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT DISTINCT player_index FROM Documents WHERE scrape = ? ORDER BY player_index", (scrape,))
+        ]
+
+    def documents(self, scrape, player_index):
+        # Document names of a player: "profile" first, then fixtures in
+        # natural order
+        names = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT document FROM Documents WHERE scrape = ? AND player_index = ?", (scrape, player_index))
+        ]
+        return sorted(names, key=lambda name: (name != "profile", natural_sort_key(name)))
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_tree(store, root_directory, scrape=None):
+    # Copy a players_fixtureN tree (PlayerN/profile.html and
+    # PlayerN/fixture/fixtureM.html) into the store, returns the number of
+    # documents copied. The tree itself is left in place.
+    scrape = scrape or os.path.basename(os.path.normpath(root_directory))
+    count = 0
+    for player_folder in os.listdir(root_directory):
+        match = re.fullmatch(r"Player(\d+)", player_folder)
+        player_folder_path = os.path.join(root_directory, player_folder)
+        if match is None or not os.path.isdir(player_folder_path):
+            continue
+        player_index = int(match.group(1))
+
+        files = [("profile", os.path.join(player_folder_path, "profile.html"))]
+        fixture_folder_path = os.path.join(player_folder_path, "fixture")
+        if os.path.isdir(fixture_folder_path):
+            files.extend(
+                (os.path.splitext(fixture_file)[0], os.path.join(fixture_folder_path, fixture_file))
+                for fixture_file in os.listdir(fixture_folder_path)
+            )
+        for document, file_path in files:
+            if os.path.isfile(file_path):
+                with open(file_path, "r", encoding="utf-8") as html_file:
+                    store.put(scrape, player_index, document, html_file.read(), commit=False)
+                count += 1
+    store.commit()
+    return count
+
+
+def migrate_trees(store_path=DEFAULT_STORE, players_directory="data/players/"):
+    # Copy every scrape tree under players_directory into the store
+    store = HtmlStore(store_path)
+    try:
+        for scrape in sorted(os.listdir(players_directory)):
+            root_directory = os.path.join(players_directory, scrape)
+            if os.path.isdir(root_directory):
+                count = migrate_tree(store, root_directory, scrape)
+                print(f"{scrape}: {count} documents")
+    finally:
+        store.close()
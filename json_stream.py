@@ -0,0 +1,88 @@
+import json
+
+
+class JsonStream:
+    # Incremental reader over a JSON text file: the file is read in chunks
+    # and values are decoded one at a time with raw_decode, so only the value
+    # being decoded and the current chunk are held in memory
+    def __init__(self, json_file, chunk_size=1 << 16):
+        self.json_file = json_file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Drop what was consumed and read the next chunk, False at the end
+        data = self.json_file.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        if not data:
+            self.eof = True
+        return bool(data)
+
+    def peek(self):
+        # Next non-whitespace character, "" at the end of the file
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        # Consume the next character, which must be one of chars
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def decode(self):
+        # Decode the next value, reading more when it runs past the buffer
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self.fill():
+                    raise
+                continue
+            # A number near the end of the buffer may go on in the next chunk
+            # ("2" of "2.5"), decode it again with more text after it
+            if isinstance(value, (int, float)) and end + 64 > len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        # Items of the array starting here, decoded one at a time
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_object_of_arrays(file_path, chunk_size=1 << 16):
+    # For a file holding {key: [item, ...], ...} yields (key, items) per key,
+    # items being a generator over the array. Whatever a caller leaves of
+    # items is skipped before the next key.
+    with open(file_path, "r", encoding="utf-8") as json_file:
+        stream = JsonStream(json_file, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.decode()
+            stream.expect(":")
+            items = stream.iter_array()
+            yield key, items
+            for _ in items:
+                pass
+            if stream.expect(",}") == "}":
+                return
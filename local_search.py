@@ -0,0 +1,269 @@
+import math
+import random
+import time
+
+from squad_sequence import SquadSequence
+
+
+class SequenceLocalSearch:
+    # Simulated-annealing local search over a sequence of teams, one per
+    # fixture, stored as lists of player ids from a PlayerSnapshot. A move
+    # swaps one or two players, mostly over the whole run of fixtures a player
+    # is in, as a greedy sequence usually uses every substitution; its effect
+    # on points, budget, position counts, team counts and the substitutions
+    # before and after each changed fixture is computed from per-fixture
+    # counters, looking only at the players that change.
+    def __init__(self, snapshot, fixture_list, position_constraints, max_players_per_team, budget, max_substitutions=3, seed=None):
+        self.snapshot = snapshot
+        self.fixture_list = fixture_list
+        self.position_constraints = position_constraints
+        self.max_players_per_team = max_players_per_team
+        self.budget = budget
+        self.max_substitutions = max_substitutions
+        self.rng = random.Random(seed)
+
+        self.prices = snapshot.prices
+        self.positions = snapshot.positions
+        self.teams = snapshot.teams
+        self.fixture_points = [snapshot.fixture_points.get(fixture) for fixture in fixture_list]
+
+        # Players available per fixture, same rule as players_by_fixture
+        self.candidates = []
+        for fixture in fixture_list:
+            candidates = [player["name"] for player in snapshot.players_by_fixture(fixture)]
+            self.candidates.append([snapshot.id_by_name[name] for name in candidates])
+        self.available = [set(candidates) for candidates in self.candidates]
+        # Same candidates grouped by position, most swaps keep the position
+        self.candidates_by_position = []
+        for candidates in self.candidates:
+            by_position = {}
+            for player_id in candidates:
+                by_position.setdefault(self.positions[player_id], []).append(player_id)
+            self.candidates_by_position.append(by_position)
+
+        self.moves = 0
+        self.accepted = 0
+        self.elapsed = 0
+
+    def load_sequence(self, team_sq):
+        # team_sq is a SquadSequence or {fixture: [player dict, ...]}
+        if isinstance(team_sq, SquadSequence):
+            self.squads = [list(squad) for squad in team_sq.squads]
+        else:
+            self.squads = [
+                [self.snapshot.id_by_name[player["name"]] for player in team_sq[fixture]]
+                for fixture in self.fixture_list
+            ]
+        self.members = [set(squad) for squad in self.squads]
+        self.costs = [sum(self.prices[player_id] for player_id in squad) for squad in self.squads]
+        self.position_counts = []
+        self.team_counts = []
+        for squad in self.squads:
+            position_counts = {}
+            team_counts = {}
+            for player_id in squad:
+                position_counts[self.positions[player_id]] = position_counts.get(self.positions[player_id], 0) + 1
+                team_counts[self.teams[player_id]] = team_counts.get(self.teams[player_id], 0) + 1
+            self.position_counts.append(position_counts)
+            self.team_counts.append(team_counts)
+        self.substitutions = [0] + [
+            len(self.members[period] - self.members[period - 1]) for period in range(1, len(self.squads))
+        ]
+        self.score = sum(
+            self.fixture_points[period][player_id]
+            for period, squad in enumerate(self.squads)
+            for player_id in squad
+        )
+        self.best_score = self.score
+        self.best_squads = [list(squad) for squad in self.squads]
+
+    def is_member(self, changes, period, player_id):
+        # Membership in the squad of `period` after the pending changes
+        removed, added = changes.get(period, ((), ()))
+        return (player_id in self.members[period] and player_id not in removed) or player_id in added
+
+    def move_delta(self, moves):
+        # Points delta of a move, a list of (period, index in squad, player in),
+        # or None when it breaks a constraint. Only the players that change
+        # are looked at, so the cost doesn't depend on the squad sizes.
+        delta = 0
+        changes = {}
+        cost_delta = {}
+        position_delta = {}
+        team_delta = {}
+        for period, slot, player_in in moves:
+            player_out = self.squads[period][slot]
+            if player_in in self.members[period] or player_in not in self.available[period]:
+                return None
+            removed, added = changes.setdefault(period, (set(), set()))
+            removed.add(player_out)
+            added.add(player_in)
+
+            points = self.fixture_points[period]
+            delta += points[player_in] - points[player_out]
+            cost_delta[period] = cost_delta.get(period, 0) + self.prices[player_in] - self.prices[player_out]
+            for key, value in ((self.positions[player_out], -1), (self.positions[player_in], 1)):
+                position_delta[(period, key)] = position_delta.get((period, key), 0) + value
+            for key, value in ((self.teams[player_out], -1), (self.teams[player_in], 1)):
+                team_delta[(period, key)] = team_delta.get((period, key), 0) + value
+
+        for period, change in cost_delta.items():
+            if self.costs[period] + change > self.budget:
+                return None
+        for (period, position), change in position_delta.items():
+            if change:
+                min_count, max_count = self.position_constraints.get(position, (0, 0))
+                count = self.position_counts[period].get(position, 0) + change
+                if count < min_count or count > max_count:
+                    return None
+        for (period, team), change in team_delta.items():
+            if change > 0 and self.team_counts[period].get(team, 0) + change > self.max_players_per_team:
+                return None
+
+        # Substitutions into every fixture next to a changed one: only the
+        # changed players can move in or out of "new compared to the fixture
+        # before"
+        boundaries = {boundary for period in changes for boundary in (period, period + 1)}
+        for boundary in boundaries:
+            if not 0 < boundary < len(self.squads):
+                continue
+            touched = set()
+            for period in (boundary - 1, boundary):
+                removed, added = changes.get(period, ((), ()))
+                touched.update(removed)
+                touched.update(added)
+            substitutions = self.substitutions[boundary]
+            for player_id in touched:
+                was_new = player_id in self.members[boundary] and player_id not in self.members[boundary - 1]
+                is_new = self.is_member(changes, boundary, player_id) and not self.is_member(changes, boundary - 1, player_id)
+                substitutions += is_new - was_new
+            if substitutions > self.max_substitutions:
+                return None
+        return delta
+
+    def apply_move(self, moves, delta):
+        touched = set()
+        for period, slot, player_in in moves:
+            player_out = self.squads[period][slot]
+            self.squads[period][slot] = player_in
+            self.members[period].discard(player_out)
+            self.members[period].add(player_in)
+            self.costs[period] += self.prices[player_in] - self.prices[player_out]
+            position_counts = self.position_counts[period]
+            position_counts[self.positions[player_out]] -= 1
+            position_counts[self.positions[player_in]] = position_counts.get(self.positions[player_in], 0) + 1
+            team_counts = self.team_counts[period]
+            team_counts[self.teams[player_out]] -= 1
+            team_counts[self.teams[player_in]] = team_counts.get(self.teams[player_in], 0) + 1
+            touched.update((period, period + 1))
+        for period in touched:
+            if 0 < period < len(self.squads):
+                self.substitutions[period] = len(self.members[period] - self.members[period - 1])
+        self.score += delta
+
+    def pick_candidate(self, period, player_out):
+        if self.rng.random() < 0.8:
+            return self.rng.choice(self.candidates_by_position[period][self.positions[player_out]])
+        return self.rng.choice(self.candidates[period])
+
+    def stint(self, period, player_id):
+        # First and last fixture of the run of consecutive fixtures around
+        # `period` that have the player
+        first = last = period
+        while first > 0 and player_id in self.members[first - 1]:
+            first -= 1
+        while last + 1 < len(self.squads) and player_id in self.members[last + 1]:
+            last += 1
+        return first, last
+
+    def stint_moves(self, period, slot, player_in):
+        # Replace the player in `slot` by player_in in every fixture of their
+        # stint. Substitutions stay the same at both ends of the stint, so
+        # this still works when every fixture uses all its substitutions.
+        player_out = self.squads[period][slot]
+        first, last = self.stint(period, player_out)
+        return [
+            (stint_period, self.squads[stint_period].index(player_out), player_in)
+            for stint_period in range(first, last + 1)
+        ]
+
+    def propose_move(self):
+        # A player replaced over their whole stint, two such replacements in
+        # the same fixture, a single swap, two swaps in one fixture, or a swap
+        # carried over some of the following fixtures
+        period = self.rng.randrange(len(self.squads))
+        slot = self.rng.randrange(len(self.squads[period]))
+        player_out = self.squads[period][slot]
+        player_in = self.pick_candidate(period, player_out)
+
+        kind = self.rng.random()
+        if kind < 0.6:
+            moves = self.stint_moves(period, slot, player_in)
+            if kind < 0.3:
+                other_slot = self.rng.randrange(len(self.squads[period]))
+                other_in = self.pick_candidate(period, self.squads[period][other_slot])
+                if other_slot != slot and other_in != player_in:
+                    other_moves = self.stint_moves(period, other_slot, other_in)
+                    moved = {(move_period, move_slot) for move_period, move_slot, _ in moves}
+                    if not any((move_period, move_slot) in moved for move_period, move_slot, _ in other_moves):
+                        moves.extend(other_moves)
+            return moves
+
+        moves = [(period, slot, player_in)]
+        if kind < 0.75:
+            other_slot = self.rng.randrange(len(self.squads[period]))
+            other_in = self.pick_candidate(period, self.squads[period][other_slot])
+            if other_slot != slot and other_in != player_in:
+                moves.append((period, other_slot, other_in))
+        elif kind < 0.9:
+            length = self.rng.randrange(1, len(self.squads))
+            for next_period in range(period + 1, min(period + 1 + length, len(self.squads))):
+                if player_out not in self.members[next_period]:
+                    break
+                moves.append((next_period, self.squads[next_period].index(player_out), player_in))
+        return moves
+
+    def run(self, iterations=50000, time_budget=None, temperature=1.0):
+        # Anneal from `temperature` down to 0, keeping the best sequence seen
+        start = time.time()
+        for iteration in range(iterations):
+            if time_budget is not None and time.time() - start > time_budget:
+                break
+            moves = self.propose_move()
+            delta = self.move_delta(moves)
+            self.moves += 1
+            if delta is None:
+                continue
+
+            current_temperature = temperature * (1 - iteration / iterations)
+            if delta >= 0 or (
+                current_temperature > 0 and self.rng.random() < math.exp(delta / current_temperature)
+            ):
+                self.apply_move(moves, delta)
+                self.accepted += 1
+                if self.score > self.best_score:
+                    self.best_score = self.score
+                    self.best_squads = [list(squad) for squad in self.squads]
+
+        self.elapsed += time.time() - start
+        return self.best_sequence()
+
+    def stats(self):
+        return {
+            "moves": self.moves,
+            "accepted": self.accepted,
+            "best_score": self.best_score,
+            "moves_per_second": self.moves / self.elapsed if self.elapsed else 0,
+        }
+
+    def best_sequence(self):
+        # Back to {fixture: [player dict, ...]} for display and fitness
+        result = {}
+        for period, (fixture, squad) in enumerate(zip(self.fixture_list, self.best_squads)):
+            team = []
+            for player_id in squad:
+                player_dict = self.snapshot.player_dict(player_id)
+                player_dict["points"] = self.fixture_points[period][player_id]
+                team.append(player_dict)
+            result[fixture] = team
+        return result
@@ -1,13 +1,41 @@
+import json
+import os
 import random
 import re
 import sqlite3
+import time
+from urllib.request import pathname2url
+
+
+def next_fixture_names(fixture_name, horizon=1):
+    # Names of the next `horizon` fixtures (fixture6 -> fixture7, fixture8, ...)
+    return [
+        re.sub(r'(\d+)', lambda x, step=step: str(int(x.group(0)) + step), fixture_name)
+        for step in range(1, max(horizon, 1) + 1)
+    ]
 
 
 class PlayerDataDB:
-    def __init__(self, db_name):
-        self.conn = sqlite3.connect(db_name)
+    def __init__(self, db_name, read_only=False):
+        if read_only:
+            # Read-only connection, e.g. for worker processes sharing the file
+            self.conn = sqlite3.connect(
+                f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro", uri=True)
+        else:
+            self.conn = sqlite3.connect(db_name)
         self.cursor = self.conn.cursor()
 
+        # Bring an existing database up to the current schema version, a new
+        # one is migrated by create_tables once its tables exist
+        if not read_only and self.has_tables():
+            self.migrate()
+
+    def has_tables(self):
+        # True when the tables the migrations work on exist
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('Players', 'Fixtures', 'Events')")
+        return self.cursor.fetchone()[0] == 3
+
     def create_tables(self):
         # Create Teams table
         self.cursor.execute(
@@ -69,46 +97,187 @@ class PlayerDataDB:
 
         self.conn.commit()
 
-    def insert_team(self, team_name, overall, attack, defend):
-        # Check if the team already exists in the database
-        existing_team = self.get_team_by_name(team_name)
+        # Bring an existing database up to the current schema version
+        self.migrate()
+
+    def migrate(self):
+        # Versioned schema migrations, tracked with PRAGMA user_version.
+        # Each migration runs in its own transaction.
+        migrations = [
+            self._migration_unique_keys_and_indexes,
+            self._migration_rating_runs,
+            self._migration_rating_cut_points,
+        ]
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+
+        for target_version, migration in enumerate(migrations, start=1):
+            if version >= target_version:
+                continue
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.cursor.execute("BEGIN")
+            try:
+                migration()
+                self.cursor.execute(f"PRAGMA user_version = {target_version}")
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            version = target_version
+
+        return version
+
+    def _migration_unique_keys_and_indexes(self):
+        # Drop duplicate fixtures (keeping the first one) and their events
+        # so the unique keys below can be created on old databases
+        self.cursor.execute(
+            """
+            DELETE FROM Events
+            WHERE fixture_id IN (
+                SELECT fixture_id FROM Fixtures
+                WHERE fixture_id NOT IN (
+                    SELECT MIN(fixture_id) FROM Fixtures
+                    GROUP BY player_name, fixture_name
+                )
+            )
+            """
+        )
+        self.cursor.execute(
+            """
+            DELETE FROM Fixtures
+            WHERE fixture_id NOT IN (
+                SELECT MIN(fixture_id) FROM Fixtures
+                GROUP BY player_name, fixture_name
+            )
+            """
+        )
+        self.cursor.execute(
+            """
+            DELETE FROM Events
+            WHERE event_id NOT IN (
+                SELECT MIN(event_id) FROM Events
+                GROUP BY fixture_id, event_name
+            )
+            """
+        )
 
-        if existing_team is None:
-            # Team does not exist, so insert it into the database
-            self.cursor.execute(
-                """
-                INSERT INTO Teams (team_name, overall, attack, defend)
-                VALUES (?, ?, ?, ?)
-                """,
-                (team_name, overall, attack, defend),
+        # One fixture row per player and fixture, one event row per fixture
+        # and event name. These are also the ON CONFLICT targets of the upserts.
+        self.cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_fixtures_player_fixture
+            ON Fixtures (player_name, fixture_name)
+            """
+        )
+        self.cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_events_fixture_event
+            ON Events (fixture_id, event_name)
+            """
+        )
+
+        # Covering indexes for the per-fixture player lookups and the event
+        # totals, so those queries never touch the table rows
+        self.cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_fixtures_fixture_name
+            ON Fixtures (fixture_name, player_name, fixture_points)
+            """
+        )
+        self.cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_events_fixture_quantity
+            ON Events (fixture_id, event_name, event_quantity, event_points)
+            """
+        )
+        self.cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_players_team_position
+            ON Players (team_name, position)
+            """
+        )
+
+    def _migration_rating_runs(self):
+        # One row per rating run and the stars every player got in it, so
+        # star changes can be diffed between runs
+        self.cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS RatingRuns (
+                run_id INTEGER PRIMARY KEY,
+                created_at TEXT,
+                weights TEXT,
+                percentiles TEXT
             )
-            self.conn.commit()
+            """
+        )
+        self.cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS PlayerRatings (
+                run_id INTEGER,
+                player_name VARCHAR(255),
+                stars INTEGER,
+                overall_score FLOAT,
+                PRIMARY KEY (run_id, player_name),
+                FOREIGN KEY (run_id) REFERENCES RatingRuns (run_id),
+                FOREIGN KEY (player_name) REFERENCES Players (name)
+            )
+            """
+        )
+
+    def _migration_rating_cut_points(self):
+        # Overall score cut points of each run, in `percentiles` order, so a
+        # past run's star thresholds can be reconstructed
+        self.cursor.execute("ALTER TABLE RatingRuns ADD COLUMN cut_points TEXT")
+
+    def insert_team(self, team_name, overall, attack, defend):
+        # Insert the team unless it already exists in the database
+        self.cursor.execute(
+            """
+            INSERT INTO Teams (team_name, overall, attack, defend)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (team_name) DO NOTHING
+            """,
+            (team_name, overall, attack, defend),
+        )
+        self.conn.commit()
+        if self.cursor.rowcount:
             return self.cursor.lastrowid
         else:
             # Team already exists, do not insert again
             return None
 
     def insert_player(self, name, position, team, price, points, injury=False):
-        # Check if the player already exists in the database
-        existing_player = self.get_player_by_name(name)
-
-        if existing_player is None:
-            # Player does not exist, so insert them into the database
-            self.cursor.execute(
-                """
-                INSERT INTO Players (name, position, team_name, price, points, stars, injury)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (name, position, team, price, points, 0, injury),
-            )
-            self.conn.commit()
+        # Insert the player unless they already exist in the database
+        self.cursor.execute(
+            """
+            INSERT INTO Players (name, position, team_name, price, points, stars, injury)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO NOTHING
+            """,
+            (name, position, team, price, points, 0, injury),
+        )
+        self.conn.commit()
+        if self.cursor.rowcount:
             return self.cursor.lastrowid
         else:
             # Player already exists, do not insert again
             return None
 
     def insert_fixture(self, player_name, fixture_name, fixture_points, team):
-        # Check if the fixture already exists for the player
+        # Insert the fixture unless it already exists for the player
+        self.cursor.execute(
+            """
+            INSERT INTO Fixtures (player_name, fixture_name, fixture_points, team_name)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (player_name, fixture_name) DO NOTHING
+            """,
+            (player_name, fixture_name, fixture_points, team),
+        )
+        self.conn.commit()
+        if self.cursor.rowcount:
+            return self.cursor.lastrowid
+
+        # The fixture already exists, so return its ID
         self.cursor.execute(
             """
             SELECT fixture_id
@@ -117,43 +286,165 @@ class PlayerDataDB:
             """,
             (player_name, fixture_name),
         )
-        existing_fixture = self.cursor.fetchone()
-
-        if not existing_fixture:
-            # The fixture does not exist, so insert it
-            self.cursor.execute(
-                """
-                INSERT INTO Fixtures (player_name, fixture_name, fixture_points, team_name)
-                VALUES (?, ?, ?, ?)
-                """,
-                (player_name, fixture_name, fixture_points, team),
-            )
-            self.conn.commit()
-            return self.cursor.lastrowid
-        else:
-            # The fixture already exists, so return its ID
-            return existing_fixture[0]
+        return self.cursor.fetchone()[0]
 
     def insert_event(self, fixture_id, event_name, event_quantity, event_points):
-        # Check if the event already exists for the fixture
-        existing_event = self.get_event_by_fixture_and_name(
-            fixture_id, event_name)
-
-        if not existing_event:
-            # Event does not exist, insert it
-            self.cursor.execute(
-                """
-                INSERT INTO Events (fixture_id, event_name, event_quantity, event_points)
-                VALUES (?, ?, ?, ?)
-                """,
-                (fixture_id, event_name, event_quantity, event_points),
-            )
-            self.conn.commit()
+        # Insert the event unless it already exists for the fixture
+        self.cursor.execute(
+            """
+            INSERT INTO Events (fixture_id, event_name, event_quantity, event_points)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (fixture_id, event_name) DO NOTHING
+            """,
+            (fixture_id, event_name, event_quantity, event_points),
+        )
+        self.conn.commit()
+        if self.cursor.rowcount:
             return self.cursor.lastrowid
         else:
             # Event already exists, do nothing
             return None
 
+    @staticmethod
+    def _iter_payload_players(players_data):
+        # Accept the whole all_players_data_fixtureN.json payload
+        # ({position: [player, ...]}) or any iterable of position lists
+        if isinstance(players_data, dict):
+            players_data = players_data.values()
+        for position in players_data:
+            for player in position:
+                yield player
+
+    @staticmethod
+    def _new_counts():
+        return {"inserted": 0, "updated": 0, "skipped": 0}
+
+    def bulk_upsert_players(self, players_data):
+        counts = self._new_counts()
+        self.cursor.execute(
+            "SELECT name, position, team_name, price, points, injury FROM Players")
+        existing = {row[0]: row[1:] for row in self.cursor.fetchall()}
+
+        rows = []
+        for player in self._iter_payload_players(players_data):
+            injury = player.get("injury", False)
+            current = existing.get(player["name"])
+            if current is None:
+                counts["inserted"] += 1
+            elif (current[1], current[3], bool(current[4])) == (player["team"], player["points"], bool(injury)):
+                counts["skipped"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+            existing[player["name"]] = (player["position"], player["team"],
+                                        player["price"], player["points"], injury)
+            rows.append((player["name"], player["position"], player["team"],
+                         player["price"], player["points"], 0, injury))
+
+        # New players get stars 0, existing ones keep their stars and price
+        # (same columns as update_player)
+        self.cursor.executemany(
+            """
+            INSERT INTO Players (name, position, team_name, price, points, stars, injury)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                points = excluded.points,
+                team_name = excluded.team_name,
+                injury = excluded.injury
+            """,
+            rows,
+        )
+        return counts
+
+    def bulk_upsert_fixtures(self, players_data):
+        counts = self._new_counts()
+        self.cursor.execute(
+            "SELECT player_name, fixture_name, fixture_points, team_name FROM Fixtures")
+        existing = {(row[0], row[1]): row[2:] for row in self.cursor.fetchall()}
+
+        rows = []
+        for player in self._iter_payload_players(players_data):
+            for fixture_name, fixture_data in player["fixtures"].items():
+                key = (player["name"], fixture_name)
+                values = (fixture_data["Points"], player["team"])
+                current = existing.get(key)
+                if current is None:
+                    counts["inserted"] += 1
+                elif tuple(current) == values:
+                    counts["skipped"] += 1
+                    continue
+                else:
+                    counts["updated"] += 1
+                existing[key] = values
+                rows.append(key + values)
+
+        self.cursor.executemany(
+            """
+            INSERT INTO Fixtures (player_name, fixture_name, fixture_points, team_name)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (player_name, fixture_name) DO UPDATE SET
+                fixture_points = excluded.fixture_points,
+                team_name = excluded.team_name
+            """,
+            rows,
+        )
+        return counts
+
+    def bulk_upsert_events(self, players_data):
+        counts = self._new_counts()
+        # Fixture ids are resolved in one query after the fixtures upsert
+        self.cursor.execute(
+            "SELECT player_name, fixture_name, fixture_id FROM Fixtures")
+        fixture_ids = {(row[0], row[1]): row[2] for row in self.cursor.fetchall()}
+        self.cursor.execute(
+            "SELECT fixture_id, event_name, event_quantity, event_points FROM Events")
+        existing = {(row[0], row[1]): row[2:] for row in self.cursor.fetchall()}
+
+        rows = []
+        for player in self._iter_payload_players(players_data):
+            for fixture_name, fixture_data in player["fixtures"].items():
+                fixture_id = fixture_ids.get((player["name"], fixture_name))
+                if fixture_id is None:
+                    continue
+                for event_name, event_data in fixture_data["events"].items():
+                    key = (fixture_id, event_name)
+                    values = (event_data["Quantity"], event_data["Points"])
+                    current = existing.get(key)
+                    if current is None:
+                        counts["inserted"] += 1
+                    elif tuple(current) == values:
+                        counts["skipped"] += 1
+                        continue
+                    else:
+                        counts["updated"] += 1
+                    existing[key] = values
+                    rows.append(key + values)
+
+        self.cursor.executemany(
+            """
+            INSERT INTO Events (fixture_id, event_name, event_quantity, event_points)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (fixture_id, event_name) DO UPDATE SET
+                event_quantity = excluded.event_quantity,
+                event_points = excluded.event_points
+            """,
+            rows,
+        )
+        return counts
+
+    def bulk_upsert(self, players_data):
+        # Write players, fixtures and events of a whole payload in a single
+        # transaction, rolled back as a whole if anything fails. The ON
+        # CONFLICT targets are the unique keys of the first migration, which
+        # drops duplicate rows before creating them.
+        self.migrate()
+        with self.conn:
+            return {
+                "players": self.bulk_upsert_players(players_data),
+                "fixtures": self.bulk_upsert_fixtures(players_data),
+                "events": self.bulk_upsert_events(players_data),
+            }
+
     def get_player_by_name(self, name):
         self.cursor.execute("SELECT * FROM Players WHERE name=?", (name,))
         result = self.cursor.fetchone()
@@ -286,33 +577,48 @@ class PlayerDataDB:
                 player_list.append(player_dict)
         return player_list
 
-    def get_players_by_fixture(self, fixture_name):
-        next_fixture_name = re.sub(r'(\d+)', lambda x: str(int(x.group(0)) + 1), fixture_name)
-        next_fixture2_name = re.sub(r'(\d+)', lambda x: str(int(x.group(0)) + 2), fixture_name)
-        next_fixture3_name = re.sub(r'(\d+)', lambda x: str(int(x.group(0)) + 3), fixture_name)
+    def get_players_by_fixture(self, fixture_name, horizon=1):
+        next_fixtures = next_fixture_names(fixture_name, horizon)
 
+        # Current points plus the points of every look-ahead fixture in one
+        # query: the look-ahead rows are pivoted per player, missing ones are 0
+        next_points_columns = ",\n".join(
+            "COALESCE(MAX(CASE WHEN NextFixtures.fixture_name = ? THEN NextFixtures.fixture_points END), 0)"
+            for _ in next_fixtures
+        )
+        placeholders = ", ".join("?" for _ in next_fixtures)
         self.cursor.execute(
-            """
-            SELECT Players.name, Players.position, Players.team_name, Players.price, Fixtures.fixture_points, Players.stars
+            f"""
+            SELECT Players.name, Players.position, Players.team_name, Players.price, Fixtures.fixture_points, Players.stars,
+            {next_points_columns}
             FROM Players
             INNER JOIN Fixtures ON Players.name = Fixtures.player_name
+            LEFT JOIN Fixtures AS NextFixtures
+                ON NextFixtures.player_name = Players.name
+                AND NextFixtures.fixture_name IN ({placeholders})
             WHERE Fixtures.fixture_name = ?
+            GROUP BY Fixtures.fixture_id
+            ORDER BY Fixtures.fixture_id
             """,
-            (fixture_name,),
+            (*next_fixtures, *next_fixtures, fixture_name),
         )
         results = self.cursor.fetchall()
         player_list = []
         for result in results:
+            next_points = list(result[6:])
             player_dict = {
                 "name": result[0],
                 "position": result[1],
                 "team": result[2],
                 "price": result[3],
                 "points": result[4],
-                "next_points": self.get_player_points_in_fixture(result[0], next_fixture_name),
+                "next_points": next_points[0],
                 "stars": result[5],
                 "rand_index": random.randint(1, 420)
             }
+            if horizon > 1:
+                # Points per look-ahead fixture, next_points first
+                player_dict["horizon_points"] = next_points
             if player_dict["next_points"] >= 0:
                 player_list.append(player_dict)
         return player_list
@@ -352,49 +658,57 @@ class PlayerDataDB:
 
         return players_list
 
-    def get_all_players_with_total_events(self, events_list):
-        all_players = self.get_all_players()
+    def get_all_players_with_total_events(self, events_list, as_matrix=False):
+        # Pivot Events per player in a single GROUP BY: one SUM per event name,
+        # NULL when the player has no row for that event
+        event_columns = ",\n".join(
+            "SUM(CASE WHEN Events.event_name = ? THEN Events.event_quantity END)"
+            for _ in events_list
+        )
+        self.cursor.execute(
+            f"""
+            SELECT Players.name, Players.price, Players.points, Players.team_name,
+            COUNT(DISTINCT Fixtures.fixture_id),
+            {event_columns}
+            FROM Players
+            LEFT JOIN Fixtures ON Players.name = Fixtures.player_name
+            LEFT JOIN Events ON Events.fixture_id = Fixtures.fixture_id
+            GROUP BY Players.name
+            ORDER BY Players.rowid
+            """,
+            tuple(events_list),
+        )
+        results = self.cursor.fetchall()
         players_with_events = []
 
-        for player_info in all_players:
-            player_name = player_info['name']
-            player_points = player_info['points']
-
+        for result in results:
             # Initialize a dictionary with the player's name
-            player_data = {'name': player_name}
-
-            # Get the list of fixtures for the player
-            fixtures_list = self.get_fixtures_by_player_name(player_name)
-            game_played = len(fixtures_list)
-
-            # Initialize a dictionary to store the total event quantities
-            total_event_quantities = {}
-
-            # Iterate through the fixtures and accumulate event quantities
-            for fixture in fixtures_list:
-                fixture_id = fixture['fixture_id']
+            player_data = {'name': result[0]}
 
-                for event in events_list:
-                    # If the event exists in the database, add its quantity to the total_event_quantities
-                    event_data = self.get_event_by_fixture_and_name(
-                        fixture_id, event)
-                    if event_data is not None:
-                        total_event_quantities[event] = total_event_quantities.get(
-                            event, 0) + event_data['event_quantity']
-
-            # Add the player's total event quantities to the player_data dictionary
-            for event, total_quantity in total_event_quantities.items():
-                player_data[event] = total_quantity
+            # Add the player's total event quantities (only events found in the DB)
+            for event, total_quantity in zip(events_list, result[5:]):
+                if total_quantity is not None:
+                    player_data[event] = total_quantity
 
             # Add the player's price to the player_data
-            player_data['Price'] = player_info['price']
-            player_data['game_played'] = game_played
-            player_data['points'] = player_points
-            player_data['team'] = player_info['team']
+            player_data['Price'] = result[1]
+            player_data['game_played'] = result[4]
+            player_data['points'] = result[2]
+            player_data['team'] = result[3]
 
             players_with_events.append(player_data)
 
-        return players_with_events
+        if not as_matrix:
+            return players_with_events
+
+        # players x events matrix in events_list column order, 0 for missing events
+        import numpy as np
+
+        events_matrix = np.array(
+            [[total or 0 for total in result[5:]] for result in results],
+            dtype=float,
+        ).reshape(len(results), len(events_list))
+        return players_with_events, events_matrix
 
     def get_all_teams(self):
         self.cursor.execute("SELECT * FROM Teams")
@@ -496,20 +810,102 @@ class PlayerDataDB:
             # Player does not exist, return False to indicate failure
             return False
 
-    def update_player_stars(self, player_scores):
-        for player_name, player_data in player_scores.items():
-            # Default to 1 star if not provided
-            rating = player_data.get("Rating", 1)
-            # Update the star rating for the player in the database
-            self.cursor.execute(
+    def update_player_stars(self, player_scores, weights=None, percentiles=None, cut_points=None):
+        # Default to 1 star if not provided
+        ratings = [
+            (player_data.get("Rating", 1), player_name)
+            for player_name, player_data in player_scores.items()
+        ]
+
+        # Update every player and record the run in a single transaction
+        with self.conn:
+            self.cursor.executemany(
                 """
                 UPDATE Players
                 SET stars = ?
                 WHERE name = ?
                 """,
-                (rating, player_name),
+                ratings,
             )
-            self.conn.commit()
+            self.cursor.execute(
+                """
+                INSERT INTO RatingRuns (created_at, weights, percentiles, cut_points)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    time.strftime("%Y-%m-%d %H:%M:%S"),
+                    json.dumps(weights, ensure_ascii=False),
+                    json.dumps(percentiles),
+                    json.dumps(cut_points),
+                ),
+            )
+            run_id = self.cursor.lastrowid
+            self.cursor.executemany(
+                """
+                INSERT INTO PlayerRatings (run_id, player_name, stars, overall_score)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (run_id, player_name, player_data.get("Rating", 1), player_data.get("Overall Score"))
+                    for player_name, player_data in player_scores.items()
+                ],
+            )
+        return run_id
+
+    def get_rating_runs(self):
+        self.cursor.execute(
+            "SELECT run_id, created_at, weights, percentiles, cut_points FROM RatingRuns ORDER BY run_id")
+        results = self.cursor.fetchall()
+        run_list = []
+        for result in results:
+            run_dict = {
+                "run_id": result[0],
+                "created_at": result[1],
+                "weights": json.loads(result[2]) if result[2] else None,
+                "percentiles": json.loads(result[3]) if result[3] else None,
+                "cut_points": json.loads(result[4]) if result[4] else None,
+            }
+            run_list.append(run_dict)
+        return run_list
+
+    def get_rating_changes(self, old_run_id=None, new_run_id=None):
+        # Defaults to the two latest runs
+        if new_run_id is None or old_run_id is None:
+            self.cursor.execute(
+                "SELECT run_id FROM RatingRuns ORDER BY run_id DESC LIMIT 2")
+            latest = [row[0] for row in self.cursor.fetchall()]
+            if len(latest) < 2:
+                return []
+            new_run_id = latest[0] if new_run_id is None else new_run_id
+            old_run_id = latest[1] if old_run_id is None else old_run_id
+
+        # Players whose stars differ between the runs, or who are only in one of them
+        self.cursor.execute(
+            """
+            SELECT NewRatings.player_name, OldRatings.stars, NewRatings.stars
+            FROM PlayerRatings AS NewRatings
+            LEFT JOIN PlayerRatings AS OldRatings
+                ON OldRatings.player_name = NewRatings.player_name AND OldRatings.run_id = ?
+            WHERE NewRatings.run_id = ? AND OldRatings.stars IS NOT NewRatings.stars
+            UNION ALL
+            SELECT OldRatings.player_name, OldRatings.stars, NULL
+            FROM PlayerRatings AS OldRatings
+            WHERE OldRatings.run_id = ? AND OldRatings.player_name NOT IN (
+                SELECT player_name FROM PlayerRatings WHERE run_id = ?
+            )
+            """,
+            (old_run_id, new_run_id, old_run_id, new_run_id),
+        )
+        results = self.cursor.fetchall()
+        changes_list = []
+        for result in results:
+            change_dict = {
+                "name": result[0],
+                "old_stars": result[1],
+                "new_stars": result[2],
+            }
+            changes_list.append(change_dict)
+        return changes_list
 
     def close(self):
         self.conn.close()
@@ -1,17 +1,54 @@
 from collections import Counter
-import copy
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from itertools import combinations
+import json
 import math
+import multiprocessing
+import os
 import random
 import time
-import pulp
 
 from playerDB import PlayerDataDB
+from player_snapshot import PlayerSnapshot
+from solve_cache import SolveCache, players_content_hash, solve_cache_key
+from solver_backend import SolverError, get_backend
+from squad_sequence import SquadSequence
+from local_search import SequenceLocalSearch
+
+
+# Analyzer of a GA worker process, created once by the pool initializer
+_ga_worker_analyzer = None
+
+
+def _init_ga_worker(db_file, settings):
+    global _ga_worker_analyzer
+    _ga_worker_analyzer = PlayersDataAnalyzer(db_file, read_only=True)
+    _ga_worker_analyzer.__dict__.update(settings)
+    _ga_worker_analyzer.warm_team_models()
+
+
+def _run_ga_task(task):
+    return _ga_worker_analyzer.run_counted_ga_task(task)
+
+
+def _run_island(db_file, settings, island, options, inbox, outbox, results):
+    # Process target of ga_islands: evolve one island, report its result
+    analyzer = PlayersDataAnalyzer(db_file, read_only=True)
+    analyzer.__dict__.update(settings)
+    try:
+        results.put((island, analyzer.evolve_island(island, inbox=inbox, outbox=outbox, **options)))
+    except Exception as error:
+        results.put((island, error))
 
 
 class PlayersDataAnalyzer:
-    def __init__(self, db_file):
-        self.db = PlayerDataDB(db_file)
+    def __init__(self, db_file, read_only=False, solver="auto", time_limit=None, mip_gap=None, warm_start=True,
+                 solve_cache=None, solve_cache_size=1000):
+        self.db_file = db_file
+        self.db = PlayerDataDB(db_file, read_only=read_only)
+        # Players and fixtures are read once and served from memory
+        self.snapshot = PlayerSnapshot(self.db)
         self.budget = 108  # Define the budget attribute
         self.position_constraints = {
             "GK": (1, 1),  # Exactly 1 goalkeeper
@@ -21,6 +58,20 @@ class PlayersDataAnalyzer:
         }
         self.max_players_per_team = 2
         self.fixture_list = ["fixture1", "fixture2", "fixture3", "fixture4", "fixture5", "fixture6"]
+        # Compiled team models per fixture, reused across solves, and the
+        # snapshot reload they were built from
+        self.team_models = {}
+        self.team_models_reload = self.snapshot.reloads
+        # MILP solver used for every solve, by default in-process HiGHS when
+        # highspy is installed and CBC otherwise. With warm_start each solve
+        # of a model starts from its previous solution, so among teams of
+        # equal score the one returned depends on the solves before it. GA
+        # tasks always solve cold, see run_ga_task.
+        self.solver = get_backend(solver, time_limit, mip_gap)
+        self.warm_start = warm_start
+        # Optional file of find_best_team results kept across runs, see
+        # solve_cache.py
+        self.solve_cache = SolveCache(solve_cache, solve_cache_size) if solve_cache else None
 
     def display_team(self, team):
         total_points = sum(player["points"] for player in team)
@@ -50,47 +101,167 @@ class PlayersDataAnalyzer:
                 f"{player['name']} ({player['position']}) - {player['team']} - Price: {player['price']} - Points: {player['points']}"
             )
 
-    def find_best_team(self, fixture="All", key="points", sub_key="points", budget=108, min_budget=92):
-        if fixture == "All":
-            player_list = self.db.get_all_players()
-        else:
-            player_list = self.db.get_players_by_fixture(fixture)
-
-        random.shuffle(player_list)
-
-        # Create a linear programming problem
-        prob = pulp.LpProblem("FantasyFootball", pulp.LpMaximize)
-
-        # Define variables: binary variables for player selection
-        player_vars = {player["name"]: pulp.LpVariable(player["name"], cat=pulp.LpBinary) for player in player_list}
-
-        # Objective function: maximize total points
-        prob += pulp.lpSum((player[key] * player_vars[player["name"]] + 0.5 * player[sub_key]
-                           * player_vars[player["name"]]) for player in player_list)
-
-        # Budget constraint
-        prob += pulp.lpSum(player["price"] * player_vars[player["name"]] for player in player_list) <= budget
-        prob += pulp.lpSum(player["price"] * player_vars[player["name"]] for player in player_list) >= min_budget
-
-        # Position constraints
-        for position, (min_count, max_count) in self.position_constraints.items():
-            prob += pulp.lpSum(player_vars[player["name"]] for player in player_list if player["position"] == position) >= min_count
-            prob += pulp.lpSum(player_vars[player["name"]] for player in player_list if player["position"] == position) <= max_count
-
-        # Max 2 players from the same team constraint
-        for team in set(player["team"] for player in player_list):
-            prob += pulp.lpSum(player_vars[player["name"]] for player in player_list if player["team"] == team) <= self.max_players_per_team
-
-        # Exactly 11 players constraint
-        prob += pulp.lpSum(player_vars.values()) == 11
-
-        # Solve the LP problem
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
-
-        # Extract the selected players as objects
-        best_team = [player for player in player_list if pulp.value(player_vars[player["name"]]) == 1]
+    def get_team_model(self, fixture):
+        # Build the model of a fixture once, later solves only change its
+        # objective, budget and fixed players
+        # Models are dropped when the snapshot reloaded changed data, also
+        # when another caller's refresh noticed the change first
+        self.snapshot.refresh()
+        if self.snapshot.reloads != self.team_models_reload:
+            self.team_models.clear()
+            self.team_models_reload = self.snapshot.reloads
+
+        if fixture not in self.team_models:
+            if fixture == "All":
+                player_list = self.snapshot.all_players()
+            else:
+                player_list = self.snapshot.players_by_fixture(fixture)
+
+            # team_model (and with it pulp) is loaded with the first model
+            from team_model import TeamModel
+
+            self.team_models[fixture] = TeamModel(
+                player_list, self.position_constraints, self.max_players_per_team)
+        return self.team_models[fixture]
+
+    def warm_team_models(self):
+        # Build every model the GA uses up front, so no task builds one
+        # halfway through and results don't depend on which process ran it
+        for fixture in self.fixture_list:
+            self.get_team_model(fixture)
+
+    def refresh_rand_index(self, players, key, sub_key):
+        # rand_index is a random tie-breaker, draw it again for every solve
+        if "rand_index" in (key, sub_key):
+            for player in players:
+                player["rand_index"] = random.randint(1, 420)
+
+    def prepare_team_model(self, model, key, sub_key):
+        self.refresh_rand_index(model.players, key, sub_key)
+        model.set_objective(key, sub_key)
+
+    def find_best_team_cache_key(self, model, fixture, key, sub_key, budget, min_budget, fixed_players):
+        # None when the result can't be reused (rand_index is random)
+        if "rand_index" in (key, sub_key):
+            return None
+        if model.content_hash is None:
+            model.content_hash = players_content_hash(model.players)
+        return solve_cache_key(
+            fixture=fixture,
+            key=key,
+            sub_key=sub_key,
+            budget=budget,
+            min_budget=min_budget,
+            fixed_players=sorted(fixed_players),
+            position_constraints=self.position_constraints,
+            max_players_per_team=self.max_players_per_team,
+            team_size=model.team_size,
+            solver=[self.solver.name, self.solver.time_limit, self.solver.mip_gap],
+            players=model.content_hash,
+        )
+
+    def find_best_team(self, fixture="All", key="points", sub_key="points", budget=108, min_budget=92, fixed_players=()):
+        model = self.get_team_model(fixture)
+        model.check_players(fixed_players)
+
+        # Repeated queries on unchanged rows are answered from the solve cache
+        cache_key = None
+        if self.solve_cache is not None:
+            cache_key = self.find_best_team_cache_key(model, fixture, key, sub_key, budget, min_budget, fixed_players)
+            names = self.solve_cache.get(cache_key) if cache_key else None
+            if names is not None:
+                model.status = "Optimal"
+                return [dict(model.players[model.index_by_name[name]]) for name in names]
+
+        self.prepare_team_model(model, key, sub_key)
+        model.set_budget(budget, min_budget)
+        model.fix_players(fixed_players)
+        model.clear_previous_team()
+
+        team = model.solve(self.solver, self.warm_start)
+        if cache_key and model.status == "Optimal":
+            self.solve_cache.put(cache_key, [player["name"] for player in team])
+        return team
+
+    def find_k_best_teams(self, fixture="All", k=10, key="points", sub_key="points", budget=108, min_budget=92, output_file=None):
+        # Top k distinct lineups in ranked order: after every solve the lineup
+        # found is cut off with a no-good constraint and the same model is
+        # solved again, warm-started from the previous lineup
+        model = self.get_team_model(fixture)
+        self.prepare_team_model(model, key, sub_key)
+        model.set_budget(budget, min_budget)
+        model.fix_players(())
+        model.clear_previous_team()
+
+        # Dominated players can be in the 2nd best team, no presolve here
+        presolve = model.presolve
+        model.presolve = False
+        best_teams = []
+        try:
+            while len(best_teams) < k:
+                try:
+                    team = model.solve(self.solver, self.warm_start)
+                except SolverError:
+                    # Fewer than k feasible lineups
+                    break
+                best_teams.append(team)
+                model.add_no_good_cut(team)
+        finally:
+            model.clear_no_good_cuts()
+            model.presolve = presolve
+
+        if output_file is not None:
+            self.save_teams(best_teams, output_file)
+        return best_teams
+
+    def sweep_budgets(self, fixture="All", budgets=range(92, 109), key="points", sub_key="points"):
+        # Points-vs-budget frontier: the model is built once, only the budget
+        # bounds change between solves and, with warm_start, every solve starts
+        # from the previous team. A budget is a maximum or a (maximum, minimum)
+        # pair.
+        model = self.get_team_model(fixture)
+        self.prepare_team_model(model, key, sub_key)
+        model.fix_players(())
+        model.clear_previous_team()
+
+        frontier = []
+        for budget in budgets:
+            budget_max, budget_min = budget if isinstance(budget, tuple) else (budget, None)
+            model.set_budget(budget_max, budget_min)
+            try:
+                team = model.solve(self.solver, self.warm_start)
+                status = model.status
+            except SolverError as error:
+                team = []
+                status = error.status
+
+            frontier.append({
+                "budget": budget_max,
+                "min_budget": budget_min,
+                "status": status,
+                "points": sum(player["points"] for player in team),
+                "objective": sum(player[key] + 0.5 * player[sub_key] for player in team),
+                "cost": sum(player["price"] for player in team),
+                "team": team,
+            })
+        return frontier
+
+    def display_frontier(self, frontier):
+        for row in frontier:
+            print(
+                f"Budget: {row['budget']} - Points: {row['points']} - Cost: {row['cost']} - Status: {row['status']}"
+            )
 
-        return best_team
+    def save_teams(self, teams, file_path):
+        # Same layout as the files in best_teams/
+        team_keys = ["name", "position", "team", "price", "points", "stars"]
+        with open(file_path, "w", encoding="utf-8") as json_file:
+            json.dump(
+                [[{key: player[key] for key in team_keys} for player in team] for team in teams],
+                json_file,
+                ensure_ascii=False,
+                indent=4,
+            )
 
     def check_team_constraints(self, team):
         total_budget = sum(player["price"] for player in team)
@@ -134,25 +305,29 @@ class PlayersDataAnalyzer:
         return team_sequence
 
     def fitness(self, teams):
+        # GA individuals carry their fitness
+        if isinstance(teams, SquadSequence):
+            return teams.fitness
         total_points = 0
         for fixture in teams:
             total_points += sum(player["points"] for player in teams[fixture])
         return total_points
 
     def crossover(self, team_sq, mutate=False):
-        team_sq_copy = copy.deepcopy(team_sq)
+        # Re-plan the window from a random fixture on, the fixtures before it
+        # are shared with the parent
         fixture = random.choice(self.fixture_list)
         index = self.fixture_list.index(fixture)
         fx_lst = self.fixture_list[index:]
-        temp = copy.deepcopy(team_sq_copy[fixture])
+        temp = team_sq.to_team(self.snapshot, fixture)
         if mutate:
             choice = random.choice(["stars", "price", "next_points", "rand_index"])
             choice2 = random.choice(["stars", "price", "next_points", "rand_index"])
-            team_sq_copy.update(self.find_best_sequence_of_squads(temp, fx_lst, key=choice, sub_key=choice2))
+            teams = self.find_best_sequence_of_squads(temp, fx_lst, key=choice, sub_key=choice2)
         else:
-            team_sq_copy.update(self.find_best_sequence_of_squads(temp, fx_lst))
+            teams = self.find_best_sequence_of_squads(temp, fx_lst)
 
-        return team_sq_copy
+        return team_sq.replace(self.snapshot, teams)
 
     def check_sequence(self, team_sq):
         for idx, fixture in enumerate(self.fixture_list[1:], start=1):
@@ -165,111 +340,405 @@ class PlayersDataAnalyzer:
                 return len(unique_names_set1)
         return None
 
-    def ga(self, size, generations, muProb):
-        random_sequences = [self.team_sequence() for i in range(size)]
-        random_sequences.sort(key=self.fitness, reverse=True)
-        print(f'Best Random Result:{self.fitness(random_sequences[0])}')
+    def ga_settings(self):
+        # Everything a worker process needs to solve like this analyzer
+        return {
+            "budget": self.budget,
+            "position_constraints": self.position_constraints,
+            "max_players_per_team": self.max_players_per_team,
+            "fixture_list": self.fixture_list,
+            "solver": self.solver,
+            # Worker processes run GA tasks only, which solve cold
+            "warm_start": False,
+        }
 
-        best = random_sequences[0]
+    def run_ga_task(self, kind, seed, args):
+        # Every individual gets its own seed and is solved without warm
+        # starts or the solve cache, so neither the random draws nor the
+        # solver's tie-breaking depend on what a process solved before: a run
+        # is reproducible whatever process evaluates it
+        random.seed(seed)
+        warm_start, solve_cache = self.warm_start, self.solve_cache
+        self.warm_start, self.solve_cache = False, None
+        try:
+            if kind == "sequence":
+                return SquadSequence.from_teams(self.snapshot, self.fixture_list, self.team_sequence())
+            team_sq, mutate = args
+            try:
+                return self.crossover(team_sq, mutate)
+            except SolverError:
+                # No feasible sequence from the chosen fixture, keep the parent
+                return team_sq
+        finally:
+            self.warm_start, self.solve_cache = warm_start, solve_cache
+
+    def run_counted_ga_task(self, task):
+        # The task result and the snapshot cache hits it took
+        hits = self.snapshot.hits
+        result = self.run_ga_task(*task)
+        return result, self.snapshot.hits - hits
+
+    @contextmanager
+    def ga_task_runner(self, workers=None):
+        # Yields a function evaluating a list of GA tasks, in order, either
+        # here or in a process pool with one read-only DB connection per worker.
+        # Snapshot cache hits of every task are added to self.ga_cache_hits.
+        self.ga_cache_hits = 0
+
+        def collect(results):
+            population = []
+            for result, hits in results:
+                population.append(result)
+                self.ga_cache_hits += hits
+            return population
+
+        if not workers or workers == 1:
+            yield lambda tasks: collect(self.run_counted_ga_task(task) for task in tasks)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_ga_worker,
+            initargs=(self.db_file, self.ga_settings()),
+        ) as executor:
+            yield lambda tasks: collect(executor.map(_run_ga_task, tasks))
+
+    def ga_generation(self, population, run_tasks, rng, muProb):
+        # Keep the better half and add one child of each survivor
+        population = population[:len(population)//2]
+        childrens = run_tasks(
+            [
+                ("crossover", rng.getrandbits(32), (population[j], rng.random() < muProb))
+                for j in range(len(population))
+            ]
+        )
+        population.extend(childrens)
+        population.sort(key=self.fitness, reverse=True)
+        return population
+
+    def ga_generation_stats(self, generation, population, solve_time, cache_hits, start):
+        fitnesses = [self.fitness(team_sq) for team_sq in population]
+        return {
+            "generation": generation,
+            "best_fitness": fitnesses[0],
+            "mean_fitness": sum(fitnesses) / len(fitnesses),
+            # Share of distinct sequences in the population
+            "diversity": len({team_sq.squads for team_sq in population}) / len(population),
+            "solve_time": solve_time,
+            "cache_hits": cache_hits,
+            "elapsed": time.time() - start,
+        }
 
-        for i in range(generations):
-            random_sequences = random_sequences[:len(random_sequences)//2]
-            childrens = []
-            for j in range(len(random_sequences)):
-                if random.random() < muProb:
+    def save_ga_checkpoint(self, file_path, generation, population, best, rng):
+        # Population as player names per fixture, so a checkpoint stays valid
+        # after the database is rebuilt
+        checkpoint = {
+            "generation": generation,
+            "fixture_list": self.fixture_list,
+            "population": [team_sq.to_names(self.snapshot) for team_sq in population],
+            "best": best.to_names(self.snapshot),
+            "rng_state": rng.getstate(),
+        }
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as json_file:
+            json.dump(checkpoint, json_file, ensure_ascii=False)
+        os.replace(temp_path, file_path)
+
+    def load_ga_checkpoint(self, file_path):
+        with open(file_path, encoding="utf-8") as json_file:
+            checkpoint = json.load(json_file)
+        if checkpoint["fixture_list"] != self.fixture_list:
+            raise ValueError("Checkpoint was saved for a different fixture list")
+        population = [
+            SquadSequence.from_names(self.snapshot, self.fixture_list, names) for names in checkpoint["population"]
+        ]
+        best = SquadSequence.from_names(self.snapshot, self.fixture_list, checkpoint["best"])
+        version, state, gauss = checkpoint["rng_state"]
+        rng = random.Random()
+        rng.setstate((version, tuple(state), gauss))
+        return checkpoint["generation"], population, best, rng
+
+    def ga(self, size, generations, muProb, workers=None, seed=None, time_budget=None, stall_generations=None,
+           callback=None, checkpoint_file=None, resume=False):
+        # Individuals are SquadSequences, the best one is returned as
+        # {fixture: [player dict, ...]}. The run stops after `generations`
+        # generations, after time_budget seconds, after stall_generations
+        # generations without a better best, or when callback returns True.
+        # callback gets the stats of each generation, also kept in
+        # self.ga_stats. With checkpoint_file the population is saved after
+        # every generation, and resume=True continues from that file.
+        start = time.time()
+        self.warm_team_models()
+        self.ga_stats = []
+
+        with self.ga_task_runner(workers) as run_tasks:
+            if resume and checkpoint_file and os.path.exists(checkpoint_file):
+                generation, random_sequences, best, rng = self.load_ga_checkpoint(checkpoint_file)
+                print(f'Resumed at Generation: {generation}')
+            else:
+                rng = random.Random(seed)
+                generation = 0
+                random_sequences = run_tasks(
+                    [("sequence", rng.getrandbits(32), None) for i in range(size)])
+                random_sequences.sort(key=self.fitness, reverse=True)
+                print(f'Best Random Result:{self.fitness(random_sequences[0])}')
+                best = random_sequences[0]
 
-                    c1 = self.crossover(random_sequences[j], True)
+            stalled = 0
+            while generation < generations:
+                if time_budget is not None and time.time() - start >= time_budget:
+                    print('Time budget reached')
+                    break
+
+                solve_start = time.time()
+                cache_hits = self.ga_cache_hits
+                random_sequences = self.ga_generation(random_sequences, run_tasks, rng, muProb)
+                generation += 1
+                print(f'Best Result in the Generation:{self.fitness(random_sequences[0])}')
+
+                if (self.fitness(best) < self.fitness(random_sequences[0])):
+                    best = random_sequences[0]
+                    stalled = 0
+                    print(f'Generation: {generation}')
+                    print(f'Best Result:{self.fitness(best)}')
                 else:
-                    c1 = self.crossover(random_sequences[j])
-                childrens.append(c1)
-            random_sequences.extend(childrens)
-            random_sequences.sort(key=self.fitness, reverse=True)
-            print(f'Best Result in the Generation:{self.fitness(random_sequences[0])}')
+                    stalled += 1
+
+                stats = self.ga_generation_stats(
+                    generation, random_sequences, time.time() - solve_start, self.ga_cache_hits - cache_hits, start)
+                self.ga_stats.append(stats)
+                if checkpoint_file:
+                    self.save_ga_checkpoint(checkpoint_file, generation, random_sequences, best, rng)
+                if callback is not None and callback(stats):
+                    break
+                if stall_generations is not None and stalled >= stall_generations:
+                    print(f'No better result in {stalled} generations')
+                    break
+        return best.to_teams(self.snapshot)
+
+    def evolve_island(self, island, size, generations, muProb, seed, migration_interval, migrants,
+                      inbox=None, outbox=None, timeout=600):
+        # One island of ga_islands: a plain GA population that every
+        # migration_interval generations sends its `migrants` best sequences
+        # to the next island and replaces its worst with the ones received
+        start = time.time()
+        rng = random.Random(seed)
+        self.warm_team_models()
+        stats = []
+        with self.ga_task_runner() as run_tasks:
+            population = run_tasks([("sequence", rng.getrandbits(32), None) for i in range(size)])
+            population.sort(key=self.fitness, reverse=True)
+            best = population[0]
+
+            for generation in range(1, generations + 1):
+                solve_start = time.time()
+                cache_hits = self.ga_cache_hits
+                population = self.ga_generation(population, run_tasks, rng, muProb)
+                if self.fitness(best) < self.fitness(population[0]):
+                    best = population[0]
+
+                if outbox is not None and generation % migration_interval == 0:
+                    # Every island sends before it receives, so the exchange
+                    # can't deadlock and doesn't depend on timing
+                    outbox.put(population[:migrants])
+                    known = {team_sq.squads for team_sq in population}
+                    incoming = [team_sq for team_sq in inbox.get(timeout=timeout) if team_sq.squads not in known]
+                    if incoming:
+                        population = population[:len(population) - len(incoming)] + incoming
+                        population.sort(key=self.fitness, reverse=True)
+                    if self.fitness(best) < self.fitness(population[0]):
+                        best = population[0]
+
+                stats.append(self.ga_generation_stats(
+                    generation, population, time.time() - solve_start, self.ga_cache_hits - cache_hits, start))
+
+        return {"island": island, "best": best, "best_fitness": self.fitness(best), "generations": stats}
+
+    def ga_islands(self, size, generations, muProb, islands=None, migration_interval=5, migrants=1, seed=None):
+        # Island-model GA: `islands` populations of `size` evolve in their own
+        # processes and pass their best sequences around a ring of queues
+        # every migration_interval generations. Returns the best sequence of
+        # all islands, per-island results are kept in self.island_stats.
+        islands = islands or os.cpu_count() or 1
+        rng = random.Random(seed)
+        seeds = [rng.getrandbits(32) for island in range(islands)]
+        options = {
+            "size": size,
+            "generations": generations,
+            "muProb": muProb,
+            "migration_interval": migration_interval,
+            "migrants": migrants,
+        }
 
-            if (self.fitness(best) < self.fitness(random_sequences[0])):
-                best = random_sequences[0]
-                print(f'Generation: {i + 1}')
+        context = multiprocessing.get_context()
+        queues = [context.Queue() for island in range(islands)]
+        results = context.Queue()
+        processes = []
+        for island in range(islands):
+            # Island i receives from queue i and sends to the next island's one
+            outbox = queues[(island + 1) % islands] if islands > 1 else None
+            inbox = queues[island] if islands > 1 else None
+            process = context.Process(
+                target=_run_island,
+                args=(self.db_file, self.ga_settings(), island, dict(options, seed=seeds[island]), inbox, outbox, results),
+            )
+            process.start()
+            processes.append(process)
+
+        island_results = {}
+        try:
+            for i in range(islands):
+                island, result = results.get()
+                if isinstance(result, Exception):
+                    raise result
+                island_results[island] = result
+        finally:
+            for process in processes:
+                if island_results.keys() != set(range(islands)):
+                    process.terminate()
+                process.join()
+
+        self.island_stats = [
+            {key: value for key, value in island_results[island].items() if key != "best"}
+            for island in range(islands)
+        ]
+        for stats in self.island_stats:
+            print(f'Island {stats["island"]}: Best Result:{stats["best_fitness"]}')
+
+        # Ties go to the lowest island, so a seeded run is reproducible
+        best = max(
+            (island_results[island]["best"] for island in range(islands)), key=self.fitness)
+        print(f'Best Result:{self.fitness(best)}')
+        return best.to_teams(self.snapshot)
+
+    def local_search(self, restarts=5, iterations=50000, time_budget=None, temperature=1.0, seed=None):
+        # Swap-move local search over the fixture window, started from
+        # `restarts` greedy sequences (the same starting points as ga())
+        rng = random.Random(seed)
+        self.warm_team_models()
+        search = SequenceLocalSearch(
+            self.snapshot, self.fixture_list, self.position_constraints, self.max_players_per_team,
+            self.budget, seed=rng.getrandbits(32))
+
+        best = None
+        best_start = None
+        for i in range(restarts):
+            random.seed(rng.getrandbits(32))
+            search.load_sequence(self.team_sequence())
+            best_start = search.score if best_start is None else max(best_start, search.score)
+            result = search.run(iterations, time_budget, temperature)
+            if best is None or self.fitness(best) < self.fitness(result):
+                best = result
+                print(f'Restart: {i + 1}')
                 print(f'Best Result:{self.fitness(best)}')
+        print(f'Best Start Result:{best_start}')
+        print(f'Moves per second:{search.stats()["moves_per_second"]:.0f}')
         return best
 
+    def optimize_sequence(self, engine="ga", **options):
+        # engine is "ga" (ILP solve per child) or "local_search"
+        if engine == "ga":
+            return self.ga(**options)
+        if engine == "local_search":
+            return self.local_search(**options)
+        raise ValueError(f"Unknown engine: {engine}")
+
+    def benchmark_sequence_engines(self, ga_options=None, local_search_options=None, seed=0):
+        # Run both engines on the same fixture window and seed, print the
+        # fitness and the time of each
+        engines = {
+            "ga": {"size": 5, "generations": 20, "muProb": 0.7, **(ga_options or {})},
+            "local_search": dict(local_search_options or {}),
+        }
+        results = {}
+        for engine, options in engines.items():
+            options.setdefault("seed", seed)
+            start = time.time()
+            best = self.optimize_sequence(engine, **options)
+            elapsed = time.time() - start
+            results[engine] = {
+                "fitness": self.fitness(best),
+                "seconds": elapsed,
+                "valid": self.check_sequence(best) is None and all(
+                    self.check_team_constraints(best[fixture]) for fixture in self.fixture_list),
+            }
+        for engine, result in results.items():
+            print(f'{engine}: fitness {result["fitness"]} in {result["seconds"]:.2f}s, valid: {result["valid"]}')
+        return results
+
     def find_best_sequence_of_squads(self, starting_team, fixture_sequence, key="points", sub_key="next_points"):
+        from team_model import TeamModel
+
         max_substitutions = 3
         selected_players_sequence = []
         result = {}
-        modified_sequence = fixture_sequence.copy()
-        modified_sequence.insert(0, "initial")
 
         for i, fixture in enumerate(fixture_sequence):
             if i == 0:
-                players_data = starting_team
+                model = TeamModel(starting_team, self.position_constraints, self.max_players_per_team)
             else:
-                players_data = self.db.get_players_by_fixture(fixture)
-                random.shuffle(players_data)
-
-            prob = pulp.LpProblem("FantasyFootball", pulp.LpMaximize)
-
-            # Define variables: binary variables for player selection
-            player_vars = {player_data["name"]: pulp.LpVariable(
-                player_data["name"], cat=pulp.LpBinary) for player_data in players_data}
-
-            prob += pulp.lpSum((player[key] * player_vars[player["name"]] + 0.5 * player[sub_key]
-                               * player_vars[player["name"]]) for player in players_data)
-
-            prob += pulp.lpSum(
-                player_data["price"] * player_vars[player_data["name"]] for player_data in players_data) <= self.budget
+                model = self.get_team_model(fixture)
 
-            for position, (min_count, max_count) in self.position_constraints.items():
-                prob += pulp.lpSum(
-                    player_vars[player_data["name"]] for player_data in players_data if player_data["position"] == position) >= min_count
-                prob += pulp.lpSum(
-                    player_vars[player_data["name"]] for player_data in players_data if player_data["position"] == position) <= max_count
-
-            teams = set(player_data["team"] for player_data in players_data)
-            for team in teams:
-                prob += pulp.lpSum(
-                    player_vars[player_data["name"]] for player_data in players_data if player_data["team"] == team) <= self.max_players_per_team
-
-            prob += pulp.lpSum(player_vars.values()) == 11
+            self.prepare_team_model(model, key, sub_key)
+            model.set_budget(self.budget)
+            model.fix_players(())
 
             # If not the first fixture, add the substitution constraint
             if i > 0:
-                substitutions = pulp.lpSum(
-                    player_vars[player_data["name"]] for player_data in players_data if player_data["name"] not in selected_players_sequence)
-                prob += substitutions <= max_substitutions
-
-            # Solve the LP problem
-            prob.solve(pulp.PULP_CBC_CMD(msg=False))
+                model.set_previous_team(selected_players_sequence, max_substitutions)
+            else:
+                model.clear_previous_team()
 
-            # Extract the selected players as objects
-            best_team = [player_data for player_data in players_data if pulp.value(
-                player_vars[player_data["name"]]) == 1]
+            best_team = model.solve(self.solver, self.warm_start)
 
             # Update selected players sequence with the new team
             selected_players_sequence = [
                 player_data["name"] for player_data in best_team]
 
-            if fixture != "initial":
-                result[fixture] = best_team
+            result[fixture] = best_team
 
         return result
 
+    def plan_sequence_of_squads(self, starting_team, fixture_sequence, key="points", sub_key="next_points"):
+        # Same result shape as find_best_sequence_of_squads, but the whole
+        # window is planned in a single multi-period solve instead of one
+        # greedy solve per fixture
+        from team_model import SequenceModel
+
+        max_substitutions = 3
+        fixture_players = []
+        for i, fixture in enumerate(fixture_sequence):
+            if i == 0:
+                players_data = starting_team
+            else:
+                players_data = self.get_team_model(fixture).players
+            self.refresh_rand_index(players_data, key, sub_key)
+            fixture_players.append((fixture, players_data))
+
+        model = SequenceModel(
+            fixture_players, self.position_constraints, self.max_players_per_team, self.budget, max_substitutions)
+        model.set_objective(key, sub_key)
+
+        return model.solve(self.solver)
+
 
-db_path = "player_data.db"
-analyzer = PlayersDataAnalyzer(db_path)
+if __name__ == "__main__":
+    db_path = "player_data.db"
+    analyzer = PlayersDataAnalyzer(db_path)
 
-# best = analyzer.find_best_team(fixture="fixture6")
-# analyzer.display_team(best)
+    # best = analyzer.find_best_team(fixture="fixture6")
+    # analyzer.display_team(best)
 
 
-best = analyzer.ga(5, 20, 0.7)
+    best = analyzer.ga(5, 20, 0.7, workers=os.cpu_count())
 
-for fixture in analyzer.fixture_list:
-    print(f'Team {fixture}:')
-    analyzer.display_team(best[fixture])
-print(analyzer.fitness(best))
+    for fixture in analyzer.fixture_list:
+        print(f'Team {fixture}:')
+        analyzer.display_team(best[fixture])
+    print(analyzer.fitness(best))
 
-fix = analyzer.check_sequence(best)
-if fix is not None:
-    print(fix)
-else:
-    print("OK!!")
+    fix = analyzer.check_sequence(best)
+    if fix is not None:
+        print(fix)
+    else:
+        print("OK!!")
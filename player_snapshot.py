@@ -0,0 +1,128 @@
+from array import array
+import random
+
+from playerDB import next_fixture_names
+
+
+class PlayerSnapshot:
+    # In-memory copy of the Players and Fixtures tables, stored as compact
+    # arrays indexed by player id (the position in the rowid-ordered Players
+    # table). Per-fixture player lists are served from it without touching
+    # SQLite. The snapshot reloads by itself when the database changes.
+    def __init__(self, db):
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.data_version = None
+        self.refresh()
+
+    def current_data_version(self):
+        # data_version moves on commits from other connections, total_changes
+        # on writes through this one
+        data_version = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self.db.conn.total_changes)
+
+    def refresh(self):
+        # Reload when the data version moved, returns True if it did
+        data_version = self.current_data_version()
+        if data_version == self.data_version:
+            self.hits += 1
+            return False
+
+        self.misses += 1
+        self.load()
+        self.data_version = data_version
+        return True
+
+    def load(self):
+        rows = self.db.conn.execute(
+            "SELECT name, position, team_name, price, points, stars FROM Players ORDER BY rowid"
+        ).fetchall()
+        self.names = [row[0] for row in rows]
+        self.positions = [row[1] for row in rows]
+        self.teams = [row[2] for row in rows]
+        # Prices are whole numbers today, fall back to floats if that changes
+        prices = [row[3] for row in rows]
+        self.prices = array("l" if all(isinstance(price, int) for price in prices) else "d", prices)
+        self.points = array("l", (row[4] for row in rows))
+        self.stars = array("l", (row[5] for row in rows))
+        self.id_by_name = {name: player_id for player_id, name in enumerate(self.names)}
+
+        # Per fixture: the ids of the players who have it (in insertion order)
+        # and a points array over all player ids, 0 for players without it
+        self.fixture_player_ids = {}
+        self.fixture_points = {}
+        rows = self.db.conn.execute(
+            "SELECT player_name, fixture_name, fixture_points FROM Fixtures ORDER BY fixture_id"
+        ).fetchall()
+        for player_name, fixture_name, fixture_points in rows:
+            player_id = self.id_by_name.get(player_name)
+            if player_id is None:
+                continue
+            if fixture_name not in self.fixture_points:
+                self.fixture_player_ids[fixture_name] = array("l")
+                self.fixture_points[fixture_name] = array("l", bytes(self.points.itemsize * len(self.names)))
+            self.fixture_player_ids[fixture_name].append(player_id)
+            self.fixture_points[fixture_name][player_id] = fixture_points
+
+        self.reloads += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+    def player_dict(self, player_id):
+        return {
+            "name": self.names[player_id],
+            "position": self.positions[player_id],
+            "team": self.teams[player_id],
+            "price": self.prices[player_id],
+            "points": self.points[player_id],
+            "stars": self.stars[player_id],
+            "rand_index": random.randint(1, 420)
+        }
+
+    def all_players(self):
+        # Same rows as PlayerDataDB.get_all_players
+        self.refresh()
+        return [self.player_dict(player_id) for player_id in range(len(self.names))]
+
+    def fixture_players(self, fixture_name, player_ids, horizon=1):
+        # Rows of players_by_fixture for the given ids, without the
+        # next_points filter
+        next_fixture_points = [
+            self.fixture_points.get(next_fixture_name)
+            for next_fixture_name in next_fixture_names(fixture_name, horizon)
+        ]
+        fixture_points = self.fixture_points[fixture_name]
+
+        player_list = []
+        for player_id in player_ids:
+            next_points = [
+                points[player_id] if points is not None else 0 for points in next_fixture_points
+            ]
+            player_dict = {
+                "name": self.names[player_id],
+                "position": self.positions[player_id],
+                "team": self.teams[player_id],
+                "price": self.prices[player_id],
+                "points": fixture_points[player_id],
+                "next_points": next_points[0],
+                "stars": self.stars[player_id],
+                "rand_index": random.randint(1, 420)
+            }
+            if horizon > 1:
+                player_dict["horizon_points"] = next_points
+            player_list.append(player_dict)
+        return player_list
+
+    def players_by_fixture(self, fixture_name, horizon=1):
+        # Same rows as PlayerDataDB.get_players_by_fixture
+        self.refresh()
+        if fixture_name not in self.fixture_points:
+            return []
+        return [
+            player_dict
+            for player_dict in self.fixture_players(fixture_name, self.fixture_player_ids[fixture_name], horizon)
+            if player_dict["next_points"] >= 0
+        ]
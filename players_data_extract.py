@@ -1,43 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor
+import html
 import os
 import json
-from bs4 import BeautifulSoup
+import re
+import time
 from data_utility import DataUtility
-from tkinter import filedialog
+from extract_manifest import ExtractManifest
+from html_store import DEFAULT_STORE, HtmlStore, natural_sort_key
 
 data_utility = DataUtility()
 
 OUTPUT_FILE_NAME = "data/all_players_data_fixture6.json"
 ROOT_DIRECTORY = "data/players/players_fixture6/"
+# Version of the parsed results kept in an ExtractManifest, bump it when a
+# parser's output changes
+PARSER_VERSION = 1
 
 
-def extract_player_profile(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
+class UnexpectedMarkup(Exception):
+    # Raised by the fast parsers for markup they don't handle, the caller
+    # falls back to BeautifulSoup
+    pass
 
-    player_name = soup.find("p", class_="player-name").get_text(strip=True)
-    player_position = soup.find(
-        "p", class_="player-position").get_text(strip=True)
-    player_team = soup.find("p", class_="player-team").get_text(strip=True)
-    player_price = int(
-        soup.find("p", class_="player-value")
-        .get_text(strip=True)
-        .replace("מחיר ", "")
-        .replace("M", "")
-    )
-    injury_icon = soup.find("img", alt="פצוע")
-    injury = True if injury_icon is not None else False
+
+COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+TAG_RE = re.compile(r"<[^>]*>")
+P_RE = re.compile(r"<p\b([^>]*)>(.*?)</p>", re.S)
+DIV_RE = re.compile(r"<div\b([^>]*)>(.*?)</div>", re.S)
+TR_RE = re.compile(r"<tr\b[^>]*>(.*?)</tr>", re.S)
+TD_RE = re.compile(r"<td\b[^>]*>(.*?)</td>", re.S)
+CLASS_RE = re.compile(r'\bclass="([^"]*)"')
+INJURY_RE = re.compile(r'<img\b[^>]*\balt="פצוע"')
+
+
+def element_strings(inner_html):
+    # Text pieces of an element, like BeautifulSoup's strings
+    return [html.unescape(piece) for piece in TAG_RE.split(inner_html)]
+
+
+def find_by_class(pattern, html_content, class_name, nested_tag):
+    # Inner HTML of the first element matched by pattern with class_name
+    # among its classes
+    for match in pattern.finditer(html_content):
+        class_match = CLASS_RE.search(match.group(1))
+        if class_match and class_name in class_match.group(1).split():
+            inner_html = match.group(2)
+            if nested_tag in inner_html:
+                raise UnexpectedMarkup(f"nested {nested_tag} in {class_name}")
+            return inner_html
+    raise UnexpectedMarkup(f"no {class_name}")
+
+
+def stripped_text(inner_html):
+    # get_text(strip=True)
+    return "".join(piece.strip() for piece in element_strings(inner_html))
+
+
+def build_player_profile(player_name, player_position, player_team, player_value, points, injury):
+    player_price = int(player_value.replace("מחיר ", "").replace("M", ""))
 
     player_position = data_utility.position_mapping.get(
         player_position, player_position
     )
 
-    player_points = int(soup.find("div", class_="points").get_text(strip=True))
-
     player_object = {
         "name": player_name,
         "position": player_position,
         "team": player_team,
         "price": player_price,
-        "points": player_points,
+        "points": int(points),
         "stars": 0,
         "injury": injury,
         "fixtures": {},
@@ -46,25 +77,62 @@ def extract_player_profile(html_content):
     return player_object
 
 
-def fixture_data(html_content):
+def extract_player_profile_fast(html_content):
+    # Regex scan for the few elements read, no tree is built
+    html_content = COMMENT_RE.sub("", html_content)
+    fields = [
+        stripped_text(find_by_class(P_RE, html_content, class_name, "<p"))
+        for class_name in ("player-name", "player-position", "player-team", "player-value")
+    ]
+    points = stripped_text(find_by_class(DIV_RE, html_content, "points", "<div"))
+
+    injury = INJURY_RE.search(html_content) is not None
+    if not injury and "פצוע" in html_content and "<img" in html_content:
+        # The alt text is there but not in the form matched above
+        raise UnexpectedMarkup("injury icon")
+
+    player_name, player_position, player_team, player_value = fields
+    return build_player_profile(player_name, player_position, player_team, player_value, points, injury)
+
+
+def extract_player_profile_soup(html_content):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, "html.parser")
 
-    data = []
+    player_name = soup.find("p", class_="player-name").get_text(strip=True)
+    player_position = soup.find(
+        "p", class_="player-position").get_text(strip=True)
+    player_team = soup.find("p", class_="player-team").get_text(strip=True)
+    player_value = soup.find("p", class_="player-value").get_text(strip=True)
+    injury_icon = soup.find("img", alt="פצוע")
+    injury = True if injury_icon is not None else False
 
-    trs = soup.find_all("tr")[1:]
+    player_points = soup.find("div", class_="points").get_text(strip=True)
+
+    return build_player_profile(player_name, player_position, player_team, player_value, player_points, injury)
 
-    for tr in trs:
-        tds = tr.find_all("td")
-        if len(tds) == 3:
-            event_name = tds[0].text.strip()
-            quantity = int(tds[1].text.strip())
-            points = int(tds[2].text.strip())
 
-            event_name = data_utility.stats_hebrew_english.get(
-                event_name, event_name)
+def extract_player_profile(html_content):
+    try:
+        return extract_player_profile_fast(html_content)
+    except (UnexpectedMarkup, ValueError):
+        return extract_player_profile_soup(html_content)
 
-            data.append(
-                {"Event": event_name, "Quantity": quantity, "Points": points})
+
+def build_fixture_table(rows):
+    # rows are the (event, quantity, points) texts of the event rows
+    data = []
+
+    for event_name, quantity, points in rows:
+        quantity = int(quantity)
+        points = int(points)
+
+        event_name = data_utility.stats_hebrew_english.get(
+            event_name, event_name)
+
+        data.append(
+            {"Event": event_name, "Quantity": quantity, "Points": points})
 
     table_dict = {
         item["Event"]: {"Quantity": item["Quantity"], "Points": item["Points"]}
@@ -74,72 +142,329 @@ def fixture_data(html_content):
     return table_dict
 
 
-def process_player_folder(player_folder_path):
-    profile_html_path = os.path.join(player_folder_path, "profile.html")
-    fixture_folder_path = os.path.join(player_folder_path, "fixture")
+def fixture_data_fast(html_content):
+    html_content = COMMENT_RE.sub("", html_content)
+    if html_content.count("<tr") != html_content.count("</tr>") or html_content.count("<table") > 1:
+        raise UnexpectedMarkup("unclosed or nested rows")
+
+    rows = []
+    for tr in TR_RE.findall(html_content)[1:]:
+        if tr.count("<td") != tr.count("</td>") or "<tr" in tr:
+            raise UnexpectedMarkup("unclosed cells")
+        tds = TD_RE.findall(tr)
+        if len(tds) == 3:
+            rows.append(["".join(element_strings(td)).strip() for td in tds])
+
+    return build_fixture_table(rows)
+
+
+def fixture_data_soup(html_content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    rows = []
+
+    trs = soup.find_all("tr")[1:]
+
+    for tr in trs:
+        tds = tr.find_all("td")
+        if len(tds) == 3:
+            rows.append([td.text.strip() for td in tds])
+
+    return build_fixture_table(rows)
 
-    player_data = extract_player_profile(
-        open(profile_html_path, "r", encoding="utf-8").read())
 
+def fixture_data(html_content):
+    try:
+        return fixture_data_fast(html_content)
+    except (UnexpectedMarkup, ValueError):
+        return fixture_data_soup(html_content)
+
+
+def fixture_entry(table_dict):
+    # Final shape of a fixture: total points and the events table
+    events = {
+        event_key: event_values for event_key, event_values in table_dict.items() if event_key != "Points"
+    }
+    return {
+        "Points": sum(event_values["Points"] for event_values in events.values()),
+        "events": events,
+    }
+
+
+def list_player_documents(player_folder_path):
+    # (fixture name, file path) of the folder's HTML files, None as the
+    # fixture name of the profile
+    documents = [(None, os.path.join(player_folder_path, "profile.html"))]
+    fixture_folder_path = os.path.join(player_folder_path, "fixture")
     if os.path.exists(fixture_folder_path):
-        for fixture_file in os.listdir(fixture_folder_path):
-            fixture_file_path = os.path.join(fixture_folder_path, fixture_file)
+        for fixture_file in sorted(os.listdir(fixture_folder_path), key=natural_sort_key):
             fixture_name = os.path.splitext(fixture_file)[0]
-            fixture = fixture_data(
-                open(fixture_file_path, "r", encoding="utf-8").read())
-            player_data["fixtures"][fixture_name] = fixture
+            documents.append((fixture_name, os.path.join(fixture_folder_path, fixture_file)))
+    return documents
+
+
+def parse_document(document):
+    # document is ("profile" or "fixture", html content)
+    kind, html_content = document
+    if kind == "profile":
+        return extract_player_profile(html_content)
+    return fixture_entry(fixture_data(html_content))
+
+
+def process_player_folder(player_folder_path):
+    player_data = None
+    for fixture_name, file_path in list_player_documents(player_folder_path):
+        with open(file_path, "r", encoding="utf-8") as html_file:
+            html_content = html_file.read()
+        if fixture_name is None:
+            player_data = parse_document(("profile", html_content))
+        else:
+            player_data["fixtures"][fixture_name] = parse_document(("fixture", html_content))
 
     return player_data
 
 
 def update_json_structure(output_file):
+    # Converts a file written by older versions, whose fixtures hold the raw
+    # events table, to the {"Points", "events"} shape written now
     with open(output_file, "r", encoding="utf-8") as file:
         data = json.load(file)
 
     for position_data in data.values():
         for player in position_data:
-            for fixture_data in player["fixtures"].values():
-                total_points = 0
-                events = {}
-
-                for event_key, event_values in fixture_data.items():
-                    if event_key != "Points":
-                        events[event_key] = event_values
-                        total_points += event_values["Points"]
-
-                fixture_data.clear()
-                fixture_data["Points"] = total_points
-                fixture_data["events"] = events
+            for fixture_name, table_dict in player["fixtures"].items():
+                player["fixtures"][fixture_name] = fixture_entry(table_dict)
 
     with open(output_file, "w", encoding="utf-8") as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
 
 
-def process_player_folders(root_directory):
+def list_player_folders(root_directory):
+    return [
+        os.path.join(root_directory, player_folder)
+        for player_folder in sorted(os.listdir(root_directory), key=natural_sort_key)
+        if os.path.isdir(os.path.join(root_directory, player_folder))
+    ]
+
+
+def iter_player_folders(root_directory, workers=None, manifest=None):
+    # Yields (folder path, player data) in folder order. With workers > 1 the
+    # folders are parsed in a process pool and streamed back as they finish,
+    # still in order. With an ExtractManifest only new or changed files are
+    # parsed, see iter_player_folders_cached.
+    if manifest is not None:
+        yield from iter_player_folders_cached(root_directory, manifest, workers)
+        return
+
+    player_folder_paths = list_player_folders(root_directory)
+    if not workers or workers == 1:
+        for player_folder_path in player_folder_paths:
+            yield player_folder_path, process_player_folder(player_folder_path)
+        return
+
+    chunksize = max(1, len(player_folder_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(
+            player_folder_paths,
+            executor.map(process_player_folder, player_folder_paths, chunksize=chunksize),
+        )
+
+
+def parse_documents(documents, workers=None):
+    # parse_document over a list, in a process pool with workers > 1
+    if not workers or workers == 1 or len(documents) < 2:
+        return [parse_document(document) for document in documents]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_document, documents, chunksize=max(1, len(documents) // (workers * 4))))
+
+
+def iter_player_folders_cached(root_directory, manifest, workers=None):
+    # Results of files parsed before come from the manifest, the rest are
+    # parsed (in a process pool with workers > 1) and added to it
+    player_folder_paths = list_player_folders(root_directory)
+    folder_documents = [list_player_documents(player_folder_path) for player_folder_path in player_folder_paths]
+
+    results = {}
+    pending = []
+    for folder_index, documents in enumerate(folder_documents):
+        for fixture_name, file_path in documents:
+            kind = "profile" if fixture_name is None else "fixture"
+            result, parse_input = manifest.lookup(file_path, kind)
+            if result is None:
+                content_hash, html_content = parse_input
+                pending.append((file_path, content_hash, kind, html_content))
+            else:
+                results[file_path] = result
+
+    parsed = parse_documents([(kind, html_content) for _, _, kind, html_content in pending], workers)
+    for (file_path, content_hash, kind, _), result in zip(pending, parsed):
+        manifest.store(content_hash, kind, result)
+        results[file_path] = result
+    manifest.commit()
+
+    for player_folder_path, documents in zip(player_folder_paths, folder_documents):
+        player_data = None
+        for fixture_name, file_path in documents:
+            if fixture_name is None:
+                player_data = results[file_path]
+            else:
+                player_data["fixtures"][fixture_name] = results[file_path]
+        yield player_folder_path, player_data
+
+
+def iter_store_players(store, scrape, workers=None, manifest=None):
+    # Same as iter_player_folders for a scrape packed in an HtmlStore, yields
+    # ("<scrape>/Player<index>", player data) in player index order
+    players = [(player_index, store.documents(scrape, player_index)) for player_index in store.player_indices(scrape)]
+
+    results = {}
+    pending = []
+    for player_index, documents in players:
+        for document in documents:
+            kind = "profile" if document == "profile" else "fixture"
+            key = (player_index, document)
+            if manifest is not None:
+                result = manifest.lookup_hash(store.content_hash(scrape, *key), kind)
+                if result is not None:
+                    results[key] = result
+                    continue
+            pending.append((key, kind))
+
+    parsed = parse_documents([(kind, store.get(scrape, *key)) for key, kind in pending], workers)
+    for (key, kind), result in zip(pending, parsed):
+        if manifest is not None:
+            manifest.store(store.content_hash(scrape, *key), kind, result)
+        results[key] = result
+    if manifest is not None:
+        manifest.commit()
+
+    for player_index, documents in players:
+        player_data = None
+        for document in documents:
+            if document == "profile":
+                player_data = results[(player_index, document)]
+            else:
+                player_data["fixtures"][document] = results[(player_index, document)]
+        if player_data is not None:
+            yield f"{scrape}/Player{player_index}", player_data
+
+
+def process_player_folders(root_directory, workers=None, output_file=OUTPUT_FILE_NAME, compact=False,
+                           manifest_path=None):
+    # Players come out of process_player_folder in their final shape and are
+    # written in a single pass, compact leaves out the indentation. With
+    # manifest_path, files parsed by an earlier run are not parsed again.
+    manifest = ExtractManifest(manifest_path, PARSER_VERSION) if manifest_path else None
+    write_players_json(iter_player_folders(root_directory, workers, manifest), output_file, compact, manifest)
+
+
+def process_store_scrape(scrape, store_path=DEFAULT_STORE, workers=None, output_file=OUTPUT_FILE_NAME,
+                         compact=False, manifest_path=None):
+    # process_player_folders for a scrape packed in an HtmlStore
+    store = HtmlStore(store_path, read_only=True)
+    manifest = ExtractManifest(manifest_path, PARSER_VERSION) if manifest_path else None
+    try:
+        write_players_json(iter_store_players(store, scrape, workers, manifest), output_file, compact, manifest)
+    finally:
+        store.close()
+
+
+def write_players_json(players, output_file, compact=False, manifest=None):
+    # players yields (source, player data), grouped by position in the file
     all_players_data = {}
 
-    for player_folder in os.listdir(root_directory):
-        player_folder_path = os.path.join(root_directory, player_folder)
+    for player_source, player_data in players:
+        print(f"Processing player folder: {player_source}")
 
-        if os.path.isdir(player_folder_path):
-            print(f"Processing player folder: {player_folder_path}")
-            player_data = process_player_folder(player_folder_path)
+        if player_data["position"] not in all_players_data:
+            all_players_data[player_data["position"]] = []
+        all_players_data[player_data["position"]].append(player_data)
 
-            if player_data["position"] not in all_players_data:
-                all_players_data[player_data["position"]] = []
-            all_players_data[player_data["position"]].append(player_data)
+    with open(output_file, "w", encoding="utf-8") as json_file:
+        if compact:
+            json.dump(all_players_data, json_file, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(all_players_data, json_file, ensure_ascii=False, indent=4)
 
-    with open(OUTPUT_FILE_NAME, "w", encoding="utf-8") as json_file:
-        json.dump(all_players_data, json_file, ensure_ascii=False, indent=4)
+    if manifest is not None:
+        manifest_stats = manifest.stats()
+        print(f"Manifest: {manifest_stats['hits']} files reused, {manifest_stats['misses']} parsed")
+        manifest.close()
 
-    update_json_structure(OUTPUT_FILE_NAME)
-
-    print(f"Player data saved to {OUTPUT_FILE_NAME}")
+    print(f"Player data saved to {output_file}")
     total_players = sum(len(players) for players in all_players_data.values())
     print(f"Total number of players: {total_players}")
 
 
+def benchmark_extraction(root_directory=ROOT_DIRECTORY, worker_counts=None):
+    # Parse the whole tree with each worker count (1, 2, 4, ... up to the
+    # number of cores by default) and print the time and speedup of each.
+    # Every run must give the same players as the serial one.
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cores:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cores:
+            worker_counts.append(cores)
+
+    results = {}
+    expected = None
+    for workers in worker_counts:
+        start = time.time()
+        players = [player_data for _, player_data in iter_player_folders(root_directory, workers)]
+        elapsed = time.time() - start
+        if expected is None:
+            expected = players
+        elif players != expected:
+            raise AssertionError(f"{workers} workers gave different players than 1 worker")
+        results[workers] = elapsed
+        print(
+            f"{workers} workers: {len(players)} players in {elapsed:.2f}s, "
+            f"speedup {results[worker_counts[0]] / elapsed:.2f}x"
+        )
+    return results
+
+
+def verify_fast_parser(root_directory="data/players/"):
+    # Differential check of the fast parsers: every profile and fixture file
+    # under root_directory must give the same dict as BeautifulSoup. Returns
+    # the files that differ (empty when all match).
+    checked = 0
+    fallbacks = 0
+    mismatches = []
+    for directory, _, file_names in os.walk(root_directory):
+        for file_name in sorted(file_names, key=natural_sort_key):
+            if not file_name.endswith(".html"):
+                continue
+            if file_name == "profile.html":
+                fast_parser, soup_parser = extract_player_profile_fast, extract_player_profile_soup
+            else:
+                fast_parser, soup_parser = fixture_data_fast, fixture_data_soup
+            file_path = os.path.join(directory, file_name)
+            with open(file_path, "r", encoding="utf-8") as html_file:
+                html_content = html_file.read()
+
+            checked += 1
+            try:
+                fast_result = fast_parser(html_content)
+            except (UnexpectedMarkup, ValueError):
+                fallbacks += 1
+                continue
+            if fast_result != soup_parser(html_content):
+                mismatches.append(file_path)
+
+    print(f"Checked {checked} files: {len(mismatches)} mismatches, {fallbacks} fall back to BeautifulSoup")
+    for file_path in mismatches:
+        print(f"Mismatch: {file_path}")
+    return mismatches
+
+
 def main():
+    from tkinter import filedialog
+
     root_directory = filedialog.askdirectory(title="Select Root Directory for Player Data")
     if root_directory:
         process_player_folders(root_directory)
@@ -0,0 +1,56 @@
+def max_blocked_teams(max_count, max_players_per_team, team_size=11):
+    # How many teams can be unusable for a swap into a team that already
+    # holds `team_size - 1` other players: a team is blocked when it is full
+    # (max_players_per_team picked players) or when every candidate from it
+    # is picked already, which needs at least one picked player of the same
+    # position (at most max_count - 1 of them besides the swapped out player)
+    others = team_size - 1
+    return max(
+        same_position + (others - same_position) // max_players_per_team
+        for same_position in range(min(max_count - 1, others) + 1)
+    )
+
+
+def find_dominated_players(players, scores, position_constraints, max_players_per_team, team_size=11, equal_price=False):
+    # Indices of players that no optimal team needs. Player q dominates p when
+    # both play the same position, q costs no more (exactly the same with
+    # equal_price, for when a minimum budget is enforced) and scores at least
+    # as much, ties broken by index. p can then be swapped for a dominating q
+    # without breaking the position, budget or size constraints, and p is
+    # dropped when such a q is always available for the team limit too:
+    #   - max_players_per_team of its dominators play for p's own team (one
+    #     of them is never picked and the team count doesn't change), or
+    #   - its dominators come from more teams than max_blocked_teams.
+    # Every swap moves to a strictly "better" player in this order, so an
+    # optimal team without dominated players always exists.
+    by_position = {}
+    for index, player in enumerate(players):
+        by_position.setdefault(player["position"], []).append(index)
+
+    dominated = set()
+    for position, indices in by_position.items():
+        max_count = position_constraints.get(position, (0, team_size))[1]
+        blocked_teams = max_blocked_teams(max_count, max_players_per_team, team_size)
+
+        # Best candidates first: cheaper, then higher scoring, then by index
+        ordered = sorted(indices, key=lambda index: (players[index]["price"], -scores[index], index))
+        for rank, index in enumerate(ordered):
+            price = players[index]["price"]
+            score = scores[index]
+            team = players[index]["team"]
+            same_team = 0
+            teams = set()
+            for other in ordered[:rank]:
+                other_price = players[other]["price"]
+                if equal_price and other_price != price:
+                    continue
+                if scores[other] < score or (scores[other] == score and other_price == price and other > index):
+                    continue
+                other_team = players[other]["team"]
+                if other_team == team:
+                    same_team += 1
+                teams.add(other_team)
+                if same_team >= max_players_per_team or len(teams) > blocked_teams:
+                    dominated.add(index)
+                    break
+    return dominated
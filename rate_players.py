@@ -1,7 +1,80 @@
 from data_utility import DataUtility
 from playerDB import PlayerDataDB
 import sys
-import numpy as np
+
+
+# Percentile levels of the star cut points: players at or above the 95th
+# percentile get 5 stars, below the 25th 1 star
+STAR_PERCENTILES = (95, 85, 55, 25)
+
+
+def event_weights_vector(events_list, event_weights):
+    # Weights in events_list order, 0 for events without a weight
+    import numpy as np
+
+    return np.array([event_weights.get(event, 0) for event in events_list], dtype=float)
+
+
+def player_arrays(player_data, events_list, events_matrix=None):
+    # Columns used by the rating engine, one row per player. events_matrix can
+    # be passed in from get_all_players_with_total_events(as_matrix=True).
+    import numpy as np
+
+    if events_matrix is None:
+        events_matrix = np.array(
+            [[player.get(event, 0) for event in events_list] for player in player_data],
+            dtype=float,
+        ).reshape(len(player_data), len(events_list))
+    games_played = np.array([player.get("game_played", 0) for player in player_data], dtype=float)
+    points = np.array([player.get("points", 0) for player in player_data], dtype=float)
+    prices = np.array([player.get("Price", 0) for player in player_data], dtype=float)
+    return events_matrix, games_played, points, prices
+
+
+def rate_players_matrix(
+    events_matrix,
+    games_played,
+    points,
+    prices,
+    weights,
+    games_played_weight=0.2,
+    points_weight=0.8,
+    price_weight=0.2,
+    percentiles=STAR_PERCENTILES,
+):
+    # weights is one event weights vector, or a (configs x events) batch of them
+    import numpy as np
+
+    weights = np.asarray(weights, dtype=float)
+    single = weights.ndim == 1
+    weights = np.atleast_2d(weights)
+    played = games_played > 0
+
+    # Performance scores for every player and every weight configuration at once
+    performance_scores = events_matrix @ weights.T
+    base_scores = (
+        games_played * games_played_weight
+        + points * points_weight
+        + prices * price_weight
+    )
+    overall_scores = performance_scores + base_scores[:, None]
+
+    # Players who didn't play any games score 0
+    performance_scores[~played] = 0
+    overall_scores[~played] = 0
+
+    # Cut points per configuration (rows follow `percentiles`), computed over
+    # players who played, then each player's number of cut points reached
+    cut_points = np.percentile(overall_scores[played], percentiles, axis=0).T
+    ratings = np.empty(overall_scores.shape, dtype=int)
+    for config, config_cut_points in enumerate(cut_points):
+        ratings[:, config] = 1 + np.searchsorted(
+            np.sort(config_cut_points), overall_scores[:, config], side="right"
+        )
+
+    if single:
+        return performance_scores[:, 0], overall_scores[:, 0], ratings[:, 0], cut_points[0]
+    return performance_scores, overall_scores, ratings, cut_points
 
 
 def rate_players(
@@ -11,69 +84,100 @@ def rate_players(
     games_played_weight=0.2,
     points_weight=0.8,
     price_weight=0.2,
+    events_matrix=None,
+    percentiles=STAR_PERCENTILES,
 ):
-    print("Starting calculate")
-    # Calculate performance scores for each player
-    player_scores = {}
-    overall_scores = []
+    player_scores, _ = rate_players_with_cut_points(
+        player_data,
+        events_list,
+        event_weights,
+        games_played_weight,
+        points_weight,
+        price_weight,
+        events_matrix,
+        percentiles,
+    )
+    return player_scores
 
-    for player in player_data:
-        games_played = player.get("game_played", 0)
-        points = player.get("points", 0)
-        player_price = player.get("Price", 0)
 
-        # Calculate performance score only if the player has played at least one game
-        if games_played > 0:
-            performance_score = sum(
-                player[event] * event_weights.get(event, 0) for event in events_list
-            )
-
-            # Calculate an adjusted performance score that includes points and price
-            adjusted_performance_score = (
-                performance_score
-                + (games_played * games_played_weight)
-                + (points * points_weight)
-                + (player_price * price_weight)
-            )
+def rate_players_with_cut_points(
+    player_data,
+    events_list,
+    event_weights,
+    games_played_weight=0.2,
+    points_weight=0.8,
+    price_weight=0.2,
+    events_matrix=None,
+    percentiles=STAR_PERCENTILES,
+):
+    # Same as rate_players, also returns the overall score cut points, one
+    # per percentile level
+    print("Starting calculate")
+    events_matrix, games_played, points, prices = player_arrays(
+        player_data, events_list, events_matrix)
+
+    performance_scores, overall_scores, ratings, cut_points = rate_players_matrix(
+        events_matrix,
+        games_played,
+        points,
+        prices,
+        event_weights_vector(events_list, event_weights),
+        games_played_weight,
+        points_weight,
+        price_weight,
+        percentiles,
+    )
+    print("Percentiles:", cut_points)
 
-            overall_scores.append(adjusted_performance_score)
-
-            # Assign a star rating based on overall score
-            player_scores[player["name"]] = {
-                "Performance Score": performance_score,
-                "Points Score": points,
-                "Overall Score": adjusted_performance_score,
-            }
-        else:
-            # Player didn't play any games, assign a 1-star rating
-            player_scores[player["name"]] = {
-                "Performance Score": 0,
-                "Points Score": points,
-                "Overall Score": 0,
-            }
-
-    # Calculate percentiles and determine ratings
-    percentiles = np.percentile(overall_scores, [95, 85, 55, 25])
-    print("Percentiles:", percentiles)
-
-    for player_name, player_data in player_scores.items():
-        overall_score = player_data["Overall Score"]
-
-        if overall_score >= percentiles[0]:
-            rating = 5
-        elif overall_score >= percentiles[1]:
-            rating = 4
-        elif overall_score >= percentiles[2]:
-            rating = 3
-        elif overall_score >= percentiles[3]:
-            rating = 2
-        else:
-            rating = 1
-
-        player_scores[player_name]["Rating"] = rating
+    player_scores = {}
+    for index, player in enumerate(player_data):
+        played = games_played[index] > 0
+        player_scores[player["name"]] = {
+            "Performance Score": float(performance_scores[index]) if played else 0,
+            "Points Score": player.get("points", 0),
+            "Overall Score": float(overall_scores[index]) if played else 0,
+            "Rating": int(ratings[index]),
+        }
 
     print("Finished")
-    return player_scores
+    return player_scores, cut_points.tolist()
+
+
+def rate_players_batch(
+    player_data,
+    events_list,
+    event_weights_list,
+    games_played_weight=0.2,
+    points_weight=0.8,
+    price_weight=0.2,
+    events_matrix=None,
+):
+    # Re-rate the same players under many event weight configurations in one
+    # call, returns one {player_name: rating} dict per configuration
+    import numpy as np
+
+    events_matrix, games_played, points, prices = player_arrays(
+        player_data, events_list, events_matrix)
+    weights = np.array(
+        [event_weights_vector(events_list, event_weights) for event_weights in event_weights_list]
+    ).reshape(len(event_weights_list), len(events_list))
+
+    _, _, ratings, _ = rate_players_matrix(
+        events_matrix,
+        games_played,
+        points,
+        prices,
+        weights,
+        games_played_weight,
+        points_weight,
+        price_weight,
+    )
+
+    names = [player["name"] for player in player_data]
+    return [
+        dict(zip(names, ratings[:, config].tolist()))
+        for config in range(len(event_weights_list))
+    ]
 
 
 def print_players_by_rating_to_file(rated_players, file_path):
@@ -110,16 +214,27 @@ def print_players_by_rating_to_file(rated_players, file_path):
     sys.stdout = sys.__stdout__
 
 
-db = PlayerDataDB("player_data.db")
-data_utility = DataUtility()
+def main(db_name="player_data.db", output_file_path="player_ratings.txt"):
+    # Rate every player, write the ratings file and store the new stars
+    db = PlayerDataDB(db_name)
+    db.create_tables()
+    data_utility = DataUtility()
+
+    all_players, events_matrix = db.get_all_players_with_total_events(
+        data_utility.events_list, as_matrix=True)
 
+    rated_players, cut_points = rate_players_with_cut_points(
+        all_players, data_utility.events_list, data_utility.event_weights, events_matrix=events_matrix
+    )
+    print_players_by_rating_to_file(rated_players, output_file_path)
 
-all_players = db.get_all_players_with_total_events(data_utility.events_list)
+    return db.update_player_stars(
+        rated_players,
+        weights=data_utility.event_weights,
+        percentiles=list(STAR_PERCENTILES),
+        cut_points=cut_points,
+    )
 
-rated_players = rate_players(
-    all_players, data_utility.events_list, data_utility.event_weights
-)
-output_file_path = "player_ratings.txt"
-print_players_by_rating_to_file(rated_players, output_file_path)
 
-db.update_player_stars(rated_players)
+if __name__ == "__main__":
+    main()
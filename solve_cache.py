@@ -0,0 +1,82 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+
+def players_content_hash(players):
+    # Hash of the player rows a model is built from, rand_index left out as
+    # it is drawn again for every read
+    digest = hashlib.sha256()
+    for player in players:
+        row = {key: value for key, value in player.items() if key != "rand_index"}
+        digest.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def solve_cache_key(**params):
+    # Normalized JSON of everything the solve result depends on
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SolveCache:
+    # Solve results on disk in a small SQLite file, keyed by solve_cache_key.
+    # Only the player names of the team are stored; entries that were not
+    # used for the longest time are dropped above max_entries.
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS SolveResults (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT,
+                last_used REAL
+            )
+            '''
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_solve_results_last_used ON SolveResults(last_used)")
+        self.conn.commit()
+
+    def get(self, cache_key):
+        row = self.conn.execute("SELECT result FROM SolveResults WHERE cache_key = ?", (cache_key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute(
+                "UPDATE SolveResults SET last_used = ? WHERE cache_key = ?", (time.time(), cache_key))
+        return json.loads(row[0])
+
+    def put(self, cache_key, result):
+        with self.conn:
+            self.conn.execute(
+                '''
+                INSERT INTO SolveResults (cache_key, result, last_used) VALUES (?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET result = excluded.result, last_used = excluded.last_used
+                ''',
+                (cache_key, json.dumps(result), time.time()),
+            )
+            self.conn.execute(
+                '''
+                DELETE FROM SolveResults WHERE cache_key IN (
+                    SELECT cache_key FROM SolveResults ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                ''',
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM SolveResults")
+
+    def stats(self):
+        entries = self.conn.execute("SELECT COUNT(*) FROM SolveResults").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,187 @@
+# pulp is imported by the backends when they solve, so importing this
+# module stays cheap
+
+
+class SolverError(Exception):
+    # Raised when a solve ends without a usable solution (e.g. infeasible)
+    def __init__(self, status):
+        super().__init__(f"Solver finished with status: {status}")
+        self.status = status
+
+
+# Statuses that come with a solution: proven optimal, or the best solution
+# found when stopped by the time limit or the MIP gap
+SOLVED_STATUSES = ("Optimal", "Feasible")
+
+
+class CbcBackend:
+    # CBC bundled with PuLP, run as a subprocess on every solve
+    name = "cbc"
+
+    def __init__(self, time_limit=None, mip_gap=None):
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+
+    def solve(self, prob, warm_start=False):
+        import pulp
+
+        prob.solve(
+            pulp.PULP_CBC_CMD(
+                msg=False,
+                timeLimit=self.time_limit,
+                gapRel=self.mip_gap,
+                warmStart=warm_start,
+            )
+        )
+        if prob.status == pulp.LpStatusOptimal:
+            if prob.sol_status == pulp.LpSolutionOptimal:
+                return "Optimal"
+            return "Feasible"
+        return pulp.LpStatus[prob.status]
+
+
+class PulpBackend:
+    # Any other solver PuLP knows by name, e.g. "GUROBI" or "CPLEX_PY"
+    def __init__(self, name, time_limit=None, mip_gap=None):
+        self.name = name
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+
+    def solve(self, prob, warm_start=False):
+        import pulp
+
+        options = {"msg": False, "timeLimit": self.time_limit, "warmStart": warm_start}
+        if self.mip_gap is not None:
+            options["gapRel"] = self.mip_gap
+        prob.solve(pulp.getSolver(self.name, **options))
+        if prob.status == pulp.LpStatusOptimal:
+            if prob.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionNoSolutionFound):
+                return "Optimal"
+            return "Feasible"
+        return pulp.LpStatus[prob.status]
+
+
+class HighsBackend:
+    # HiGHS inside this process through highspy: the PuLP model is passed as
+    # arrays, so no subprocess is spawned and no model files are written
+    name = "highs"
+
+    def __init__(self, time_limit=None, mip_gap=None):
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+
+    @staticmethod
+    def available():
+        try:
+            import highspy  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def solve(self, prob, warm_start=False):
+        import highspy
+        import numpy as np
+        import pulp
+
+        variables = prob.variables()
+        column_by_name = {variable.name: column for column, variable in enumerate(variables)}
+        infinity = highspy.kHighsInf
+
+        highs = highspy.Highs()
+        highs.silent()
+        if self.time_limit is not None:
+            highs.setOptionValue("time_limit", float(self.time_limit))
+        if self.mip_gap is not None:
+            highs.setOptionValue("mip_rel_gap", float(self.mip_gap))
+
+        # Columns: bounds, integrality and objective
+        lower = np.array([-infinity if v.lowBound is None else v.lowBound for v in variables], dtype=float)
+        upper = np.array([infinity if v.upBound is None else v.upBound for v in variables], dtype=float)
+        highs.addVars(len(variables), lower, upper)
+        integer_columns = np.array(
+            [column for column, v in enumerate(variables) if v.cat == pulp.LpInteger], dtype=np.int32)
+        if len(integer_columns):
+            highs.changeColsIntegrality(
+                len(integer_columns),
+                integer_columns,
+                np.full(len(integer_columns), highspy.HighsVarType.kInteger.value, dtype=np.uint8),
+            )
+        objective = prob.objective or pulp.LpAffineExpression()
+        costs = np.zeros(len(variables))
+        for variable, coefficient in objective.items():
+            costs[column_by_name[variable.name]] = coefficient
+        highs.changeColsCost(len(variables), np.arange(len(variables), dtype=np.int32), costs)
+        highs.changeObjectiveOffset(float(objective.constant))
+        if prob.sense == pulp.LpMaximize:
+            highs.changeObjectiveSense(highspy.ObjSense.kMaximize)
+
+        # Rows in compressed sparse row form
+        row_lower, row_upper, starts, indices, values = [], [], [], [], []
+        for constraint in prob.constraints.values():
+            starts.append(len(indices))
+            for variable, coefficient in constraint.items():
+                indices.append(column_by_name[variable.name])
+                values.append(coefficient)
+            rhs = -constraint.constant
+            row_lower.append(rhs if constraint.sense in (pulp.LpConstraintGE, pulp.LpConstraintEQ) else -infinity)
+            row_upper.append(rhs if constraint.sense in (pulp.LpConstraintLE, pulp.LpConstraintEQ) else infinity)
+        if starts:
+            highs.addRows(
+                len(starts),
+                np.array(row_lower, dtype=float),
+                np.array(row_upper, dtype=float),
+                len(indices),
+                np.array(starts, dtype=np.int32),
+                np.array(indices, dtype=np.int32),
+                np.array(values, dtype=float),
+            )
+
+        # Warm start from the values of the previous solve, kept in the variables
+        if warm_start and variables and all(v.varValue is not None for v in variables):
+            start = np.clip(np.array([v.varValue for v in variables], dtype=float), lower, upper)
+            highs.setSolution(len(variables), np.arange(len(variables), dtype=np.int32), start)
+
+        highs.run()
+        model_status = highs.getModelStatus()
+        has_solution = highs.getInfo().primal_solution_status == 2  # kSolutionStatusFeasible
+
+        if has_solution:
+            for variable, value in zip(variables, highs.getSolution().col_value):
+                variable.varValue = round(value) if variable.cat == pulp.LpInteger else value
+
+        if model_status == highspy.HighsModelStatus.kOptimal:
+            prob.status = pulp.LpStatusOptimal
+            return "Optimal"
+        if model_status == highspy.HighsModelStatus.kInfeasible:
+            prob.status = pulp.LpStatusInfeasible
+            return "Infeasible"
+        if model_status in (highspy.HighsModelStatus.kUnbounded, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+            prob.status = pulp.LpStatusUnbounded
+            return "Unbounded"
+        if has_solution:
+            prob.status = pulp.LpStatusOptimal
+            return "Feasible"
+        prob.status = pulp.LpStatusNotSolved
+        return "Not Solved"
+
+
+def get_backend(name="auto", time_limit=None, mip_gap=None):
+    # "auto" prefers the in-process HiGHS solver and falls back to CBC
+    if name == "auto":
+        name = "highs" if HighsBackend.available() else "cbc"
+    if name == "highs":
+        return HighsBackend(time_limit, mip_gap)
+    if name == "cbc":
+        return CbcBackend(time_limit, mip_gap)
+    return PulpBackend(name, time_limit, mip_gap)
+
+
+def solve(prob, backend=None, warm_start=False):
+    # Solve with the given backend (CBC by default), raising SolverError
+    # instead of returning a model without a solution
+    if backend is None:
+        backend = CbcBackend()
+    status = backend.solve(prob, warm_start)
+    if status not in SOLVED_STATUSES:
+        raise SolverError(status)
+    return status
@@ -0,0 +1,68 @@
+class SquadSequence:
+    # Immutable GA individual: one tuple of player ids (PlayerSnapshot ids)
+    # per fixture, plus the points of each fixture and their total. Fixtures
+    # that a child doesn't change share the parent's tuples, and fitness is
+    # only summed once, when a squad is created.
+    __slots__ = ("fixture_list", "squads", "fixture_fitness", "fitness")
+
+    def __init__(self, fixture_list, squads, fixture_fitness):
+        self.fixture_list = fixture_list
+        self.squads = squads
+        self.fixture_fitness = fixture_fitness
+        self.fitness = sum(fixture_fitness)
+
+    def __getstate__(self):
+        return (self.fixture_list, self.squads, self.fixture_fitness)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @staticmethod
+    def squad_from_team(snapshot, team):
+        return tuple(snapshot.id_by_name[player["name"]] for player in team)
+
+    @classmethod
+    def from_teams(cls, snapshot, fixture_list, teams):
+        # teams is {fixture: [player dict, ...]}, player points are the
+        # points of that fixture
+        return cls(
+            tuple(fixture_list),
+            tuple(cls.squad_from_team(snapshot, teams[fixture]) for fixture in fixture_list),
+            tuple(sum(player["points"] for player in teams[fixture]) for fixture in fixture_list),
+        )
+
+    @classmethod
+    def from_names(cls, snapshot, fixture_list, names):
+        # names is a list of player names per fixture, as in a GA checkpoint
+        squads = tuple(
+            tuple(snapshot.id_by_name[name] for name in fixture_names) for fixture_names in names
+        )
+        return cls(
+            tuple(fixture_list),
+            squads,
+            tuple(
+                sum(snapshot.fixture_points[fixture][player_id] for player_id in squad)
+                for fixture, squad in zip(fixture_list, squads)
+            ),
+        )
+
+    def to_names(self, snapshot):
+        return [[snapshot.names[player_id] for player_id in squad] for squad in self.squads]
+
+    def replace(self, snapshot, teams):
+        # New sequence with the given fixtures replaced, sharing the rest
+        squads = list(self.squads)
+        fixture_fitness = list(self.fixture_fitness)
+        for period, fixture in enumerate(self.fixture_list):
+            if fixture in teams:
+                squads[period] = self.squad_from_team(snapshot, teams[fixture])
+                fixture_fitness[period] = sum(player["points"] for player in teams[fixture])
+        return SquadSequence(self.fixture_list, tuple(squads), tuple(fixture_fitness))
+
+    def to_team(self, snapshot, fixture):
+        # Player dicts of one fixture, as served by players_by_fixture
+        return snapshot.fixture_players(fixture, self.squads[self.fixture_list.index(fixture)])
+
+    def to_teams(self, snapshot):
+        # Back to {fixture: [player dict, ...]} for display
+        return {fixture: self.to_team(snapshot, fixture) for fixture in self.fixture_list}
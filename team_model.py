@@ -0,0 +1,234 @@
+import pulp
+
+from presolve import find_dominated_players
+from solver_backend import solve
+
+
+def add_team_constraints(prob, player_vars, players, position_constraints, max_players_per_team, team_size=11, prefix=""):
+    # Group the variables by position and team in a single pass
+    position_vars = {position: [] for position in position_constraints}
+    team_vars = {}
+    for player_var, player in zip(player_vars, players):
+        position_vars.setdefault(player["position"], []).append(player_var)
+        team_vars.setdefault(player["team"], []).append(player_var)
+
+    # Budget constraints, the caller sets their bounds
+    cost = pulp.LpAffineExpression(
+        [(player_var, player["price"]) for player_var, player in zip(player_vars, players)]
+    )
+    prob += (cost <= 0, f"{prefix}budget_max")
+    prob += (cost >= 0, f"{prefix}budget_min")
+
+    # Position constraints
+    for position, (min_count, max_count) in position_constraints.items():
+        selected = pulp.lpSum(position_vars[position])
+        prob += (selected >= min_count, f"{prefix}{position}_min")
+        prob += (selected <= max_count, f"{prefix}{position}_max")
+
+    # Max players from the same team constraint
+    for team_index, team_players in enumerate(team_vars.values()):
+        prob += (pulp.lpSum(team_players) <= max_players_per_team, f"{prefix}team_{team_index}")
+
+    # Exactly 11 players constraint
+    prob += (pulp.lpSum(player_vars) == team_size, f"{prefix}team_size")
+
+
+class TeamModel:
+    # Team selection ILP compiled once for a fixed list of players. Variables
+    # and the position/team/size constraints are built a single time, between
+    # solves only the objective, the budget bounds, the fixed players and the
+    # substitution base are changed.
+    def __init__(self, players, position_constraints, max_players_per_team, team_size=11):
+        self.players = players
+        self.team_size = team_size
+        self.position_constraints = position_constraints
+        self.max_players_per_team = max_players_per_team
+        self.prob = pulp.LpProblem("FantasyFootball", pulp.LpMaximize)
+
+        # Define variables: binary variables for player selection
+        self.player_vars = [
+            pulp.LpVariable(f"player_{index}", cat=pulp.LpBinary) for index in range(len(players))
+        ]
+        self.index_by_name = {player["name"]: index for index, player in enumerate(players)}
+
+        add_team_constraints(
+            self.prob, self.player_vars, players, position_constraints, max_players_per_team, team_size)
+
+        self.status = None
+        self.fixed_names = set()
+        self.previous_names = set()
+        self.no_good_cuts = []
+        self.min_budget = None
+        self.scores = [0] * len(players)
+
+        # Dominated players are left out of each solve (see presolve.py),
+        # pruned_count is the number left out of the last one
+        self.presolve = True
+        self.pruned_count = 0
+        self.dominated_cache = {}
+
+        # Hash of the player rows, set by the analyzer for its solve cache
+        self.content_hash = None
+
+    def set_objective(self, key="points", sub_key="points", sub_weight=0.5):
+        # Maximize key + sub_weight * sub_key over the selected players
+        self.scores = [player[key] + sub_weight * player[sub_key] for player in self.players]
+        self.prob.setObjective(
+            pulp.LpAffineExpression(list(zip(self.player_vars, self.scores)))
+        )
+
+    def set_budget(self, budget, min_budget=None):
+        self.min_budget = min_budget
+        self.prob.constraints["budget_max"].changeRHS(budget)
+        self.prob.constraints["budget_min"].changeRHS(min_budget if min_budget is not None else 0)
+
+    def dominated_players(self):
+        # With a minimum budget only equally priced players can replace each other
+        equal_price = bool(self.min_budget)
+        cache_key = (tuple(self.scores), equal_price)
+        if cache_key not in self.dominated_cache:
+            if len(self.dominated_cache) > 32:
+                self.dominated_cache.clear()
+            self.dominated_cache[cache_key] = find_dominated_players(
+                self.players,
+                self.scores,
+                self.position_constraints,
+                self.max_players_per_team,
+                self.team_size,
+                equal_price,
+            )
+        return self.dominated_cache[cache_key]
+
+    def apply_presolve(self):
+        # Fix dominated players to 0, except fixed players and players of the
+        # previous team (dropping those could cost a substitution)
+        pruned = set()
+        if self.presolve:
+            kept = self.fixed_names | self.previous_names
+            pruned = {
+                index for index in self.dominated_players() if self.players[index]["name"] not in kept
+            }
+        for index, player_var in enumerate(self.player_vars):
+            player_var.upBound = 0 if index in pruned else 1
+        self.pruned_count = len(pruned)
+
+    def check_players(self, names):
+        # ValueError listing the names that aren't players of this model
+        unknown = sorted(set(names) - self.index_by_name.keys())
+        if unknown:
+            raise ValueError(f"Unknown players: {', '.join(unknown)}")
+
+    def fix_players(self, names):
+        # Force the given players into the team, releasing previously fixed ones
+        self.check_players(names)
+        for name in self.fixed_names:
+            self.player_vars[self.index_by_name[name]].lowBound = 0
+        self.fixed_names = set(names)
+        for name in self.fixed_names:
+            self.player_vars[self.index_by_name[name]].lowBound = 1
+
+    def set_previous_team(self, names, max_substitutions):
+        # At most max_substitutions players from outside the previous team,
+        # i.e. at least team_size - max_substitutions of its players are kept
+        self.clear_previous_team()
+        self.previous_names = set(names)
+        kept = pulp.lpSum(
+            self.player_vars[self.index_by_name[name]] for name in names if name in self.index_by_name
+        )
+        self.prob.addConstraint(kept >= self.team_size - max_substitutions, "substitutions")
+
+    def clear_previous_team(self):
+        self.previous_names = set()
+        self.prob.constraints.pop("substitutions", None)
+
+    def add_no_good_cut(self, team):
+        # Exclude exactly this lineup from later solves
+        cut_name = f"no_good_{len(self.no_good_cuts)}"
+        self.prob.addConstraint(
+            pulp.lpSum(self.player_vars[self.index_by_name[player["name"]]] for player in team)
+            <= len(team) - 1,
+            cut_name,
+        )
+        self.no_good_cuts.append(cut_name)
+
+    def clear_no_good_cuts(self):
+        for cut_name in self.no_good_cuts:
+            self.prob.constraints.pop(cut_name, None)
+        self.no_good_cuts = []
+
+    def solve(self, backend=None, warm_start=False):
+        self.apply_presolve()
+
+        # Solve the LP problem, raises SolverError when there is no team
+        self.status = solve(self.prob, backend, warm_start)
+
+        # Extract copies of the selected players
+        return [
+            dict(player)
+            for player_var, player in zip(self.player_vars, self.players)
+            if pulp.value(player_var) == 1
+        ]
+
+
+class SequenceModel:
+    # Multi-period model of a whole fixture window: one set of selection
+    # variables per fixture, linked by transfer variables so that at most
+    # max_substitutions players come in between consecutive fixtures. The
+    # first fixture can only pick from starting_team.
+    def __init__(self, fixture_players, position_constraints, max_players_per_team, budget, max_substitutions=3, team_size=11):
+        # fixture_players is a list of (fixture, players) in playing order
+        self.fixture_players = fixture_players
+        self.prob = pulp.LpProblem("FantasySequence", pulp.LpMaximize)
+        self.player_vars = []
+        self.status = None
+
+        previous_vars = None
+        for period, (fixture, players) in enumerate(fixture_players):
+            player_vars = [
+                pulp.LpVariable(f"player_{period}_{index}", cat=pulp.LpBinary) for index in range(len(players))
+            ]
+            prefix = f"f{period}_"
+            add_team_constraints(
+                self.prob, player_vars, players, position_constraints, max_players_per_team, team_size, prefix)
+            self.prob.constraints[f"{prefix}budget_max"].changeRHS(budget)
+
+            if previous_vars is not None:
+                # transfer_in >= selected now - selected in the previous fixture
+                transfers = []
+                for index, (player_var, player) in enumerate(zip(player_vars, players)):
+                    transfer_var = pulp.LpVariable(f"transfer_{period}_{index}", lowBound=0, upBound=1)
+                    previous_var = previous_vars.get(player["name"])
+                    if previous_var is None:
+                        self.prob += transfer_var >= player_var
+                    else:
+                        self.prob += transfer_var >= player_var - previous_var
+                    transfers.append(transfer_var)
+                self.prob += (pulp.lpSum(transfers) <= max_substitutions, f"{prefix}substitutions")
+
+            previous_vars = {player["name"]: player_var for player_var, player in zip(player_vars, players)}
+            self.player_vars.append(player_vars)
+
+    def set_objective(self, key="points", sub_key="next_points", sub_weight=0.5):
+        # Total of key + sub_weight * sub_key over every fixture of the window
+        self.prob.setObjective(
+            pulp.LpAffineExpression(
+                [
+                    (player_var, player[key] + sub_weight * player[sub_key])
+                    for (fixture, players), player_vars in zip(self.fixture_players, self.player_vars)
+                    for player_var, player in zip(player_vars, players)
+                ]
+            )
+        )
+
+    def solve(self, backend=None, warm_start=False):
+        self.status = solve(self.prob, backend, warm_start)
+
+        # Extract copies of the selected players per fixture
+        return {
+            fixture: [
+                dict(player)
+                for player_var, player in zip(player_vars, players)
+                if pulp.value(player_var) == 1
+            ]
+            for (fixture, players), player_vars in zip(self.fixture_players, self.player_vars)
+        }
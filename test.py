@@ -1,8 +1,11 @@
-import pulp
 from player_data_analyzer import PlayersDataAnalyzer
+from solver_backend import solve
 
 
 def find_best_sequence_of_squads(analyzer, fixture_names, players):
+    # pulp is only loaded when a sequence is built here
+    import pulp
+
     num_fixtures = len(fixture_names)
     max_substitutions = 3
 
@@ -95,7 +98,7 @@ def find_best_sequence_of_squads(analyzer, fixture_names, players):
             prob += substitutions <= max_substitutions
 
         # Solve the LP problem
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        solve(prob, analyzer.solver)
 
         # Extract the selected players as objects
         best_team = [
@@ -174,20 +177,21 @@ def get_user_team():
 
 
 # Example usage
-analyzer = PlayersDataAnalyzer("player_data.db")
-fixture_names = [
-    "fixture1",
-    "fixture2",
-    "fixture3",
-    "fixture4",
-    "fixture5"
-]
-
-team = analyzer.find_best_team(key="price", fixture="fixture1")
-results = [find_best_sequence_of_squads(analyzer, fixture_names, team) for i in range(10)]
-# results.sort(key=lambda x: x["total_points_over_sequence"])
-print(results[0])
-print(results[1])
+if __name__ == "__main__":
+    analyzer = PlayersDataAnalyzer("player_data.db")
+    fixture_names = [
+        "fixture1",
+        "fixture2",
+        "fixture3",
+        "fixture4",
+        "fixture5"
+    ]
+
+    team = analyzer.find_best_team(key="price", fixture="fixture1")
+    results = [find_best_sequence_of_squads(analyzer, fixture_names, team) for i in range(10)]
+    # results.sort(key=lambda x: x["total_points_over_sequence"])
+    print(results[0])
+    print(results[1])
 
 # for result in results:
 #     print(f"Fixture: {result['fixture_name']}")
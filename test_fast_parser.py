@@ -0,0 +1,18 @@
+import contextlib
+import io
+import unittest
+
+from players_data_extract import verify_fast_parser
+
+
+# The fast HTML parsers must match BeautifulSoup on every scraped file, run
+# with: python -m pytest test_fast_parser.py
+class FastParserTest(unittest.TestCase):
+    def test_matches_soup_on_every_file(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mismatches = verify_fast_parser("data/players/")
+        self.assertEqual(mismatches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
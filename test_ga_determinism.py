@@ -0,0 +1,26 @@
+import contextlib
+import io
+import unittest
+
+from player_data_analyzer import PlayersDataAnalyzer
+
+
+# ga() promises that a seed gives the same result for any worker count, run
+# with: python -m pytest test_ga_determinism.py
+class GaDeterminismTest(unittest.TestCase):
+    def run_ga(self, workers, seed):
+        analyzer = PlayersDataAnalyzer("player_data.db", read_only=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = analyzer.ga(8, 4, 0.7, workers=workers, seed=seed)
+        return {fixture: sorted(player["name"] for player in team) for fixture, team in best.items()}
+
+    def test_same_result_for_any_worker_count(self):
+        for seed in (1, 2, 3):
+            serial = self.run_ga(1, seed)
+            for workers in (2, 3):
+                with self.subTest(seed=seed, workers=workers):
+                    self.assertEqual(serial, self.run_ga(workers, seed))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from player_data_analyzer import PlayersDataAnalyzer
+
+
+# A DB update must only invalidate the cached solves of the fixtures whose
+# rows changed, run with: python -m pytest test_solve_cache.py
+class SolveCacheInvalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.directory, "player_data.db")
+        shutil.copy("player_data.db", self.db_file)
+        self.analyzer = PlayersDataAnalyzer(
+            self.db_file, solve_cache=os.path.join(self.directory, "solve_cache.db"))
+
+    def tearDown(self):
+        self.analyzer.solve_cache.close()
+        self.analyzer.db.conn.close()
+        shutil.rmtree(self.directory)
+
+    def test_changed_fixture_misses_other_fixtures_hit(self):
+        team = self.analyzer.find_best_team("fixture1")
+        self.analyzer.find_best_team("fixture3")
+        player_name = team[0]["name"]
+
+        # Another connection changes a fixture1 row, the snapshot sees it first
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute(
+                "UPDATE Fixtures SET fixture_points = fixture_points + 1 WHERE player_name = ? AND fixture_name = 'fixture1'",
+                (player_name,),
+            )
+        self.analyzer.snapshot.players_by_fixture("fixture1")
+
+        cache = self.analyzer.solve_cache
+        misses = cache.misses
+        self.analyzer.find_best_team("fixture1")
+        self.assertEqual(cache.misses, misses + 1)
+
+        hits = cache.hits
+        self.analyzer.find_best_team("fixture3")
+        self.assertEqual(cache.hits, hits + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from player_data_analyzer import PlayersDataAnalyzer
+
+
+# Team models must follow DB changes however the snapshot noticed them, run
+# with: python -m pytest test_team_models.py
+class TeamModelRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.directory, "player_data.db")
+        shutil.copy("player_data.db", self.db_file)
+        self.analyzer = PlayersDataAnalyzer(self.db_file)
+
+    def tearDown(self):
+        self.analyzer.db.conn.close()
+        shutil.rmtree(self.directory)
+
+    def test_models_rebuilt_after_snapshot_read_the_change(self):
+        team = self.analyzer.find_best_team("fixture1")
+        top_scorer = max(team, key=lambda player: player["points"])["name"]
+
+        # Another connection changes the row, the snapshot sees it first
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute(
+                "UPDATE Fixtures SET fixture_points = -50 WHERE player_name = ? AND fixture_name = 'fixture1'",
+                (top_scorer,),
+            )
+        players = {player["name"]: player for player in self.analyzer.snapshot.players_by_fixture("fixture1")}
+        self.assertEqual(players[top_scorer]["points"], -50)
+
+        team = self.analyzer.find_best_team("fixture1")
+        self.assertNotIn(top_scorer, [player["name"] for player in team])
+
+
+if __name__ == "__main__":
+    unittest.main()